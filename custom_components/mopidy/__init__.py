@@ -2,7 +2,6 @@
 import logging
 from typing import Any
 
-from mopidyapi import MopidyAPI
 from requests.exceptions import ConnectionError as reConnectionError
 
 from homeassistant.components.media_player import DOMAIN as MEDIA_PLAYER_DOMAIN
@@ -11,22 +10,27 @@ from homeassistant.const import CONF_HOST, CONF_PORT
 from homeassistant.core import HomeAssistant
 from homeassistant.exceptions import ConfigEntryNotReady
 
-from .const import DOMAIN
+from .api import MopidyClient
+from .const import DOMAIN, RPC_CONNECT_TIMEOUT_SECONDS, RPC_TIMEOUT_SECONDS
+from .services import async_setup_services
 
 _LOGGER = logging.getLogger(__name__)
 
 
 async def async_setup(hass: HomeAssistant, config: dict[str, Any]) -> bool:
     """Set up the mopidy component."""
+    hass.data.setdefault(DOMAIN, {})
+    async_setup_services(hass)
     return True
 
 
 def _test_connection(host: str, port: int) -> bool:
-    client = MopidyAPI(
+    client = MopidyClient(
         host=host,
         port=port,
         use_websocket=False,
         logger=logging.getLogger(__name__ + ".client"),
+        timeout=(RPC_CONNECT_TIMEOUT_SECONDS, RPC_TIMEOUT_SECONDS),
     )
     client.rpc_call("core.get_version")
     return True
@@ -54,4 +58,12 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     hass.data.setdefault(DOMAIN, {})
 
     await hass.config_entries.async_forward_entry_setups(entry, [MEDIA_PLAYER_DOMAIN])
+    entry.async_on_unload(entry.add_update_listener(_async_update_options))
     return True
+
+
+async def _async_update_options(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Apply changed options without reloading the entry."""
+    entity = hass.data.get(DOMAIN, {}).get(entry.entry_id)
+    if entity is not None:
+        entity.apply_options(entry.options)
@@ -0,0 +1,309 @@
+"""Mopidy JSON-RPC client used by the Mopidy integration."""
+from collections.abc import Iterator
+from contextlib import contextmanager
+from json.decoder import JSONDecodeError
+import logging
+import random
+import threading
+import time
+from typing import Any
+
+from mopidyapi import MopidyAPI
+from mopidyapi.exceptions import MopidyError
+from mopidyapi.parsedata import deserialize_mopidy, serialize_mopidy
+from requests import post
+from requests.exceptions import ConnectionError as reConnectionError, ReadTimeout, RequestException
+
+from .const import (
+    BREAKER_BACKOFF_MAX_SECONDS,
+    BREAKER_BACKOFF_MIN_SECONDS,
+    BREAKER_FAILURE_THRESHOLD,
+    BREAKER_JITTER,
+    RPC_LONG_TIMEOUT_SECONDS,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+BREAKER_CLOSED = "closed"
+BREAKER_OPEN = "open"
+BREAKER_HALF_OPEN = "half_open"
+
+# Calls that may legitimately take long; they get the long read timeout by default
+LONG_RUNNING_METHODS = frozenset({
+    "core.library.refresh",
+    "core.library.search",
+    "core.playlists.create",
+    "core.playlists.refresh",
+    "core.playlists.save",
+})
+
+_DEFAULT = object()
+
+
+class CircuitOpenError(reConnectionError):
+    """Raised instead of calling a server whose circuit breaker is open."""
+
+
+class RpcTimeoutError(MopidyError):
+    """Raised when a long-running call did not answer within its timeout.
+
+    The server accepted the connection, so this is not a connection error.
+    """
+
+
+class CircuitBreaker:
+    """Circuit breaker guarding the RPC calls to one Mopidy server.
+
+    After BREAKER_FAILURE_THRESHOLD consecutive connection failures the
+    breaker opens and calls fail fast. Once the backoff has passed, a single
+    probe call is let through (half-open): success closes the breaker, failure
+    opens it again with a doubled, jittered backoff.
+    """
+
+    def __init__(self, name: str) -> None:
+        """Initialize a closed breaker"""
+        self.name = name
+        self._lock = threading.Lock()
+        self._state = BREAKER_CLOSED
+        self._failures = 0
+        self._backoff = 0.0
+        self._retry_at = 0.0
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        """Return the breaker state"""
+        return self._state
+
+    @property
+    def is_open(self) -> bool:
+        """Return whether calls are currently rejected"""
+        with self._lock:
+            if self._state == BREAKER_OPEN:
+                return time.monotonic() < self._retry_at
+            return self._state == BREAKER_HALF_OPEN and self._probing
+
+    def allow_request(self) -> bool:
+        """Return whether a call may be made, claiming the probe when half-open"""
+        with self._lock:
+            if self._state == BREAKER_CLOSED:
+                return True
+            if self._state == BREAKER_OPEN:
+                if time.monotonic() < self._retry_at:
+                    return False
+                self._state = BREAKER_HALF_OPEN
+                self._probing = False
+                _LOGGER.debug("Circuit breaker for %s is half-open, probing", self.name)
+            if self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self) -> None:
+        """Close the breaker after a successful call"""
+        with self._lock:
+            if self._state != BREAKER_CLOSED:
+                _LOGGER.info("Mopidy server at %s is reachable again", self.name)
+            self._state = BREAKER_CLOSED
+            self._failures = 0
+            self._backoff = 0.0
+            self._probing = False
+
+    def record_failure(self) -> None:
+        """Count a connection failure, opening the breaker when needed"""
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self._state == BREAKER_HALF_OPEN:
+                self._backoff = min(self._backoff * 2, BREAKER_BACKOFF_MAX_SECONDS)
+                _LOGGER.debug(
+                    "Mopidy server at %s is still unreachable, retrying in %.0f seconds",
+                    self.name,
+                    self._backoff,
+                )
+            elif self._state == BREAKER_CLOSED and self._failures >= BREAKER_FAILURE_THRESHOLD:
+                self._backoff = BREAKER_BACKOFF_MIN_SECONDS
+                _LOGGER.warning(
+                    "Mopidy server at %s is unreachable, pausing requests for %.0f seconds",
+                    self.name,
+                    self._backoff,
+                )
+            else:
+                return
+
+            self._state = BREAKER_OPEN
+            jitter = 1 + random.uniform(-BREAKER_JITTER, BREAKER_JITTER)
+            self._retry_at = time.monotonic() + self._backoff * jitter
+
+
+class MopidyClient(MopidyAPI):
+    """MopidyAPI client with batch requests and a circuit breaker."""
+
+    def __init__(
+        self,
+        *args: Any,
+        breaker: CircuitBreaker | None = None,
+        timeout: float | tuple[float, float] | None = None,
+        long_timeout: float | None = RPC_LONG_TIMEOUT_SECONDS,
+        **kwargs: Any,
+    ) -> None:
+        """Initialize the client, sharing breaker across reconnects
+
+        Args:
+            breaker: Circuit breaker guarding the calls
+            timeout: requests timeout, in seconds, for every RPC call
+            long_timeout: read timeout, in seconds, for long-running calls
+        """
+        self.breaker = breaker
+        self.timeout = timeout
+        self.long_timeout = long_timeout
+        self._overrides = threading.local()
+        super().__init__(*args, **kwargs)
+
+    @property
+    def long_running_timeout(self) -> float | tuple[float, float | None] | None:
+        """Return the timeout of long-running calls: the usual connect timeout and the long read timeout"""
+        if isinstance(self.timeout, tuple):
+            return (self.timeout[0], self.long_timeout)
+        if self.timeout is None:
+            return None
+        return (self.timeout, self.long_timeout)
+
+    @contextmanager
+    def long_running_calls(self, timeout: Any = _DEFAULT) -> Iterator[None]:
+        """Use another timeout for the calls made by this thread in the block
+
+        A read timeout of such a call raises RpcTimeoutError instead of
+        counting as a connection failure.
+
+        Args:
+            timeout: requests timeout, defaults to long_running_timeout;
+                None waits for the answer without any timeout
+        """
+        previous = getattr(self._overrides, "timeout", _DEFAULT)
+        self._overrides.timeout = self.long_running_timeout if timeout is _DEFAULT else timeout
+        try:
+            yield
+        finally:
+            self._overrides.timeout = previous
+
+    def __timeout(self, methods: list[str]) -> tuple[Any, bool]:
+        """Return the timeout of a request and whether it is long-running"""
+        timeout = getattr(self._overrides, "timeout", _DEFAULT)
+        if timeout is not _DEFAULT:
+            return timeout, True
+        if any(x in LONG_RUNNING_METHODS for x in methods):
+            return self.long_running_timeout, True
+        return self.timeout, False
+
+    def __post(self, payload: dict[str, Any] | list[dict[str, Any]]) -> Any:
+        """POST a JSON-RPC payload through the circuit breaker"""
+        methods = [x['method'] for x in payload] if isinstance(payload, list) else [payload['method']]
+        timeout, long_running = self.__timeout(methods)
+
+        if self.breaker is not None and not self.breaker.allow_request():
+            raise CircuitOpenError(f"Circuit breaker for {self.breaker.name} is open")
+
+        try:
+            response = post(self.http_url, json=payload, timeout=timeout).json()
+        except ReadTimeout as ex:
+            if not long_running:
+                if self.breaker is not None:
+                    self.breaker.record_failure()
+                raise reConnectionError(ex) from ex
+            # The server is reachable, just slow
+            if self.breaker is not None:
+                self.breaker.record_success()
+            raise RpcTimeoutError(f"{', '.join(methods)} did not answer in time") from ex
+        except (RequestException, JSONDecodeError) as ex:
+            if self.breaker is not None:
+                self.breaker.record_failure()
+            if isinstance(ex, reConnectionError):
+                raise
+            raise reConnectionError(ex) from ex
+        except BaseException:
+            # Never leave a claimed half-open probe behind
+            if self.breaker is not None:
+                self.breaker.record_failure()
+            raise
+
+        if self.breaker is not None:
+            self.breaker.record_success()
+        return response
+
+    def __raise_error(self, item: dict[str, Any]) -> None:
+        """Raise the error of a JSON-RPC response, if any"""
+        if 'error' in item:
+            errmsg = item['error'].get('data', {}).get('message') or item['error'].get('message')
+            self.logger.error("Mopidy error: %s", errmsg)
+            raise MopidyError(str(errmsg))
+
+    def rpc_call(self, command: str, *args: Any, **kwargs: Any) -> Any:
+        """Call a Mopidy JSON-RPC method.
+
+        Raises:
+            MopidyError: If the call failed
+            RpcTimeoutError: If a long-running call did not answer in time
+            reConnectionError: If Mopidy server is unavailable
+        """
+        self.logger.debug("Calling Mopidy method: %s", command)
+
+        rpcjson = {'jsonrpc': '2.0', 'id': 0, 'method': command}
+        if kwargs:
+            rpcjson['params'] = serialize_mopidy(kwargs)
+        elif args:
+            rpcjson['params'] = serialize_mopidy(list(args))
+
+        response = self.__post(rpcjson)
+        self.__raise_error(response)
+        return deserialize_mopidy(response['result'])
+
+    def rpc_batch(
+        self,
+        calls: list[tuple[str, dict[str, Any]]],
+        return_errors: bool = False,
+    ) -> list[Any]:
+        """Send several RPC calls in one HTTP request.
+
+        Mopidy handles the calls of a batch in order. Results are returned in
+        the order of calls.
+
+        Args:
+            calls: List of (method, keyword arguments) tuples
+            return_errors: Return the MopidyError of a failed call as its
+                result instead of raising it
+
+        Raises:
+            MopidyError: If any of the calls failed
+            RpcTimeoutError: If a long-running call did not answer in time
+            reConnectionError: If Mopidy server is unavailable
+        """
+        if len(calls) == 0:
+            return []
+
+        payload = []
+        for call_id, (command, kwargs) in enumerate(calls):
+            rpcjson = {'jsonrpc': '2.0', 'id': call_id, 'method': command}
+            if kwargs:
+                rpcjson['params'] = serialize_mopidy(kwargs)
+            payload.append(rpcjson)
+
+        self.logger.debug("Calling Mopidy methods: %s", ", ".join(x[0] for x in calls))
+        response = self.__post(payload)
+        if not isinstance(response, list):
+            # A batch Mopidy could not handle is answered with a single error
+            if isinstance(response, dict):
+                self.__raise_error(response)
+            raise MopidyError(f"Unexpected response to a batch request: {response!r}")
+
+        results: list[Any] = [None] * len(calls)
+        for item in response:
+            try:
+                self.__raise_error(item)
+            except MopidyError as error:
+                if not return_errors:
+                    raise
+                results[item['id']] = error
+                continue
+            results[item['id']] = deserialize_mopidy(item.get('result'))
+        return results
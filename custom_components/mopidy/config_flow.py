@@ -4,7 +4,6 @@ import re
 import socket
 from typing import Any, Optional
 
-from mopidyapi import MopidyAPI
 from requests.exceptions import ConnectionError as reConnectionError
 import voluptuous as vol
 
@@ -14,18 +13,60 @@ from homeassistant.core import callback
 import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers.typing import DiscoveryInfoType
 
-from .const import DEFAULT_PORT, DOMAIN  # pylint: disable=unused-import
+from .api import MopidyClient
+from .const import (  # pylint: disable=unused-import
+    CACHE_MAX_SIZE,
+    CONF_ART_CACHE_SIZE,
+    CONF_IMAGE_BATCH_SIZE,
+    CONF_POLL_INTERVAL_CONNECTED,
+    CONF_POLL_INTERVAL_IDLE,
+    CONF_POLL_INTERVAL_PLAYING,
+    CONF_POLL_INTERVAL_UNAVAILABLE_MAX,
+    CONF_QUEUE_ATTRIBUTE_WINDOW,
+    CONF_RESTORE_TIMEOUT,
+    CONF_RPC_CONNECT_TIMEOUT,
+    CONF_RPC_LONG_TIMEOUT,
+    CONF_RPC_TIMEOUT,
+    CONF_SEARCH_CACHE_SIZE,
+    CONF_TRACK_CACHE_SIZE,
+    CONF_UPDATE_DEADLINE,
+    CONF_UPDATE_MODE,
+    CONF_VOLUME_STEP,
+    DEFAULT_IMAGE_BATCH_SIZE,
+    DEFAULT_POLL_INTERVAL_CONNECTED,
+    DEFAULT_POLL_INTERVAL_IDLE,
+    DEFAULT_POLL_INTERVAL_PLAYING,
+    DEFAULT_POLL_INTERVAL_UNAVAILABLE_MAX,
+    DEFAULT_PORT,
+    DEFAULT_QUEUE_ATTRIBUTE_WINDOW,
+    DOMAIN,
+    RESTORE_TIMEOUT_SECONDS,
+    RPC_CONNECT_TIMEOUT_SECONDS,
+    RPC_LONG_TIMEOUT_SECONDS,
+    RPC_TIMEOUT_SECONDS,
+    SEARCH_CACHE_MAX_SIZE,
+    TRACK_CACHE_MAX_SIZE,
+    UPDATE_DEADLINE_SECONDS,
+    UPDATE_MODE_POLL,
+    UPDATE_MODE_PUSH,
+    VOLUME_STEP_PERCENT,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
+POLL_INTERVAL_VALIDATOR = vol.All(vol.Coerce(int), vol.Range(min=1, max=3600))
+SECONDS_VALIDATOR = vol.All(vol.Coerce(int), vol.Range(min=1, max=600))
+CACHE_SIZE_VALIDATOR = vol.All(vol.Coerce(int), vol.Range(min=1, max=100000))
+
 
 def _validate_input(host: str, port: int) -> bool:
     """Validate the user input."""
-    client = MopidyAPI(
+    client = MopidyClient(
         host=host,
         port=port,
         use_websocket=False,
         logger=logging.getLogger(__name__ + ".client"),
+        timeout=(RPC_CONNECT_TIMEOUT_SECONDS, RPC_TIMEOUT_SECONDS),
     )
     client.rpc_call("core.get_version")
     return True
@@ -43,6 +84,12 @@ class MopidyConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         self._name: Optional[str] = None
         self._uuid: Optional[str] = None
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry: config_entries.ConfigEntry) -> "MopidyOptionsFlow":
+        """Get the options flow for this handler."""
+        return MopidyOptionsFlow()
+
     @callback
     def _async_get_entry(self) -> config_entries.ConfigFlowResult:
         """Create config entry with current flow data."""
@@ -169,3 +216,41 @@ class MopidyConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 "port": self._port,
             },
         )
+
+
+class MopidyOptionsFlow(config_entries.OptionsFlow):
+    """Handle the options of a Mopidy Server."""
+
+    async def async_step_init(self, user_input: dict[str, Any] | None = None) -> config_entries.ConfigFlowResult:
+        """Manage the polling, cache, timeout and update options."""
+        if user_input is not None:
+            return self.async_create_entry(title="", data=user_input)
+
+        options = self.config_entry.options
+        fields = [
+            (CONF_UPDATE_MODE, UPDATE_MODE_PUSH, vol.In([UPDATE_MODE_PUSH, UPDATE_MODE_POLL])),
+            (CONF_POLL_INTERVAL_PLAYING, DEFAULT_POLL_INTERVAL_PLAYING, POLL_INTERVAL_VALIDATOR),
+            (CONF_POLL_INTERVAL_CONNECTED, DEFAULT_POLL_INTERVAL_CONNECTED, POLL_INTERVAL_VALIDATOR),
+            (CONF_POLL_INTERVAL_IDLE, DEFAULT_POLL_INTERVAL_IDLE, POLL_INTERVAL_VALIDATOR),
+            (CONF_POLL_INTERVAL_UNAVAILABLE_MAX, DEFAULT_POLL_INTERVAL_UNAVAILABLE_MAX, POLL_INTERVAL_VALIDATOR),
+            (CONF_RPC_CONNECT_TIMEOUT, RPC_CONNECT_TIMEOUT_SECONDS, SECONDS_VALIDATOR),
+            (CONF_RPC_TIMEOUT, RPC_TIMEOUT_SECONDS, SECONDS_VALIDATOR),
+            (CONF_RPC_LONG_TIMEOUT, RPC_LONG_TIMEOUT_SECONDS, vol.All(vol.Coerce(int), vol.Range(min=1, max=3600))),
+            (CONF_UPDATE_DEADLINE, UPDATE_DEADLINE_SECONDS, SECONDS_VALIDATOR),
+            (CONF_RESTORE_TIMEOUT, RESTORE_TIMEOUT_SECONDS, SECONDS_VALIDATOR),
+            (CONF_ART_CACHE_SIZE, CACHE_MAX_SIZE, CACHE_SIZE_VALIDATOR),
+            (CONF_SEARCH_CACHE_SIZE, SEARCH_CACHE_MAX_SIZE, CACHE_SIZE_VALIDATOR),
+            (CONF_TRACK_CACHE_SIZE, TRACK_CACHE_MAX_SIZE, CACHE_SIZE_VALIDATOR),
+            (CONF_QUEUE_ATTRIBUTE_WINDOW, DEFAULT_QUEUE_ATTRIBUTE_WINDOW, vol.All(vol.Coerce(int), vol.Range(min=0))),
+            (CONF_IMAGE_BATCH_SIZE, DEFAULT_IMAGE_BATCH_SIZE, vol.All(vol.Coerce(int), vol.Range(min=1, max=1000))),
+            (CONF_VOLUME_STEP, VOLUME_STEP_PERCENT, vol.All(vol.Coerce(int), vol.Range(min=1, max=50))),
+        ]
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema(
+                {
+                    vol.Required(key, default=options.get(key, default)): validator
+                    for key, default, validator in fields
+                }
+            ),
+        )
@@ -1,47 +1,142 @@
 """Constants for the Mopidy integration."""
 from collections import OrderedDict
+from typing import Any
 
 DOMAIN = "mopidy"
 ICON = "mdi:speaker-wireless"
 DEFAULT_NAME = "Mopidy"
 DEFAULT_PORT = 6680
+
+# Options
+CONF_POLL_INTERVAL_PLAYING = "poll_interval_playing"
+CONF_POLL_INTERVAL_CONNECTED = "poll_interval_connected"
+CONF_POLL_INTERVAL_IDLE = "poll_interval_idle"
+CONF_POLL_INTERVAL_UNAVAILABLE_MAX = "poll_interval_unavailable_max"
+DEFAULT_POLL_INTERVAL_PLAYING = 10  # Playing without a websocket connection
+DEFAULT_POLL_INTERVAL_CONNECTED = 60  # Playing, or idle without a websocket connection
+DEFAULT_POLL_INTERVAL_IDLE = 300  # Idle with a websocket connection
+DEFAULT_POLL_INTERVAL_UNAVAILABLE_MAX = 600  # Upper bound of the backoff while unavailable
+CONF_ART_CACHE_SIZE = "art_cache_size"
+CONF_SEARCH_CACHE_SIZE = "search_cache_size"
+CONF_TRACK_CACHE_SIZE = "track_cache_size"
+CONF_QUEUE_ATTRIBUTE_WINDOW = "queue_attribute_window"
+CONF_IMAGE_BATCH_SIZE = "image_batch_size"
+CONF_RPC_CONNECT_TIMEOUT = "rpc_connect_timeout"
+CONF_RPC_TIMEOUT = "rpc_timeout"
+CONF_RPC_LONG_TIMEOUT = "rpc_long_timeout"
+CONF_UPDATE_DEADLINE = "update_deadline"
+CONF_RESTORE_TIMEOUT = "restore_timeout"
+CONF_VOLUME_STEP = "volume_step"
+CONF_UPDATE_MODE = "update_mode"
+UPDATE_MODE_PUSH = "push"  # Websocket events, polling catches up
+UPDATE_MODE_POLL = "poll"  # Polling only, no websocket connection
+DEFAULT_QUEUE_ATTRIBUTE_WINDOW = 0  # Tracks in the queue_tracks attribute, 0 for the whole queue
+DEFAULT_IMAGE_BATCH_SIZE = 10  # Spotify images per get_images call, Spotify throttles lookups
 SERVICE_SET_CONSUME_MODE = "set_consume_mode"
 SERVICE_SNAPSHOT = "snapshot"
 SERVICE_RESTORE = "restore"
 SERVICE_SEARCH = "search"
 SERVICE_GET_SEARCH_RESULT = "get_search_result"
+SERVICE_SEARCH_ALL = "search_all"
+SERVICE_GROUP_SNAPSHOT = "group_snapshot"
+SERVICE_GROUP_RESTORE = "group_restore"
 
 # Cache configuration
 CACHE_MAX_SIZE = 1000  # Maximum entries in cache dictionaries
 
+# Search result cache configuration
+SEARCH_CACHE_MAX_SIZE = 256  # Maximum cached search/find_exact queries per server
+SEARCH_CACHE_TTL_SECONDS = 300  # Lifetime of a cached search result
+
+# Track metadata cache configuration
+TRACK_CACHE_MAX_SIZE = 5000  # Maximum normalized track metadata entries per server
+
+# Artwork prefetch configuration
+IMAGE_PREFETCH_TRACKS = 5  # Upcoming queue tracks whose images are fetched ahead
+IMAGE_CACHE_MAX_SIZE = 100  # Maximum cached track image lists per server
+
+# Playback history configuration
+HISTORY_MAX_SIZE = 200  # Played tracks kept in the local history of each server
+HISTORY_SAVE_DELAY_SECONDS = 30  # Delay before a changed history is written to storage
+HISTORY_STORAGE_VERSION = 1
+
+# Play statistics configuration
+STATS_RETENTION_DAYS = 31  # Daily play count buckets kept for period statistics
+STATS_MAX_TOTALS = 5000  # All-time play counts kept per group, the most played ones
+STATS_SAVE_DELAY_SECONDS = 60  # Delay before changed statistics are written to storage
+STATS_STORAGE_VERSION = 1
+
+# Snapshot configuration
+SNAPSHOT_SAVE_DELAY_SECONDS = 1  # Delay before changed snapshots are written to storage
+SNAPSHOT_STORAGE_VERSION = 1
+
+# Federated search configuration
+SEARCH_ALL_TIMEOUT_SECONDS = 10  # Default per-server timeout for search_all
+
+# Fuzzy search configuration
+FUZZY_INDEX_BROWSE_URI = "local:directory?type=track"  # Library listing used to build the index
+FUZZY_INDEX_LOOKUP_BATCH = 500  # Track URIs resolved per library.lookup call while indexing
+FUZZY_SEARCH_MAX_RESULTS = 50  # Maximum ranked results returned by a fuzzy search
+FUZZY_SEARCH_MIN_SCORE = 0.3  # Minimum similarity (0..1) for a fuzzy match
+
 # Snapshot restore configuration
-RESTORE_RETRY_MAX = 120  # Maximum retry attempts for snapshot restore
-RESTORE_RETRY_INTERVAL_SECONDS = 0.5  # Sleep interval between retries
+RESTORE_TIMEOUT_SECONDS = 60  # Maximum wait for playback to start when restoring
+GROUP_RESTORE_TIMEOUT_SECONDS = 30  # Default per-server timeout for group_restore
+
+# Connection configuration
+BREAKER_FAILURE_THRESHOLD = 3  # Consecutive connection failures before requests are paused
+BREAKER_BACKOFF_MIN_SECONDS = 5  # First pause after a server became unreachable
+BREAKER_BACKOFF_MAX_SECONDS = 300  # Upper bound of the doubling pause
+BREAKER_JITTER = 0.2  # Relative random spread of each pause
+RPC_CONNECT_TIMEOUT_SECONDS = 3  # Timeout for connecting to the Mopidy server
+RPC_TIMEOUT_SECONDS = 15  # Timeout for the response to a single RPC call
+RPC_LONG_TIMEOUT_SECONDS = 300  # Timeout for the response to a long-running call, e.g. a library refresh
+UPDATE_DEADLINE_SECONDS = 8  # No new calls are started after this part of a refresh cycle
+
+# Websocket configuration
+DATA_WEBSOCKETS = f"{DOMAIN}_websockets"
+WS_HEARTBEAT_SECONDS = 30  # Ping interval; a missing pong closes the connection
+WS_RECONNECT_MIN_SECONDS = 1  # First delay before reconnecting a websocket
+WS_RECONNECT_MAX_SECONDS = 60  # Upper bound of the doubling reconnect delay
+WS_EVENT_QUEUE_SIZE = 256  # Pending events per server before the oldest are dropped
+POSITION_DRIFT_CHECK_SECONDS = 300  # Maximum age of a media position before it is queried again
+EVENT_COALESCE_SECONDS = 0.25  # Window in which bursts of events are merged into one refresh
+
+# Queue configuration
+ENQUEUE_BATCH_SIZE = 250  # Track URIs added per tracklist.add request
+DIRECTORY_BROWSE_BATCH_SIZE = 10  # Directories browsed per request when expanding a directory
+DIRECTORY_MAX_DEPTH = 5  # Sub-directory levels descended into when playing a directory
+DIRECTORY_MAX_TRACKS = 5000  # Tracks queued at most when playing a directory
+DIRECTORY_MAX_BROWSED = 500  # Directories browsed at most when playing a directory
 
 # Volume control configuration
 VOLUME_STEP_PERCENT = 5  # Volume adjustment step size
 
-# Bounded LRU caches for artwork and titles
+# Bounded LRU cache for titles; browse artwork is cached per entity
 CACHE_TITLES: OrderedDict[str, str] = OrderedDict()
-CACHE_ART: OrderedDict[str, str | None] = OrderedDict()
 
 
-def _bounded_cache_set(cache: OrderedDict[str, str | None], key: str, value: str | None) -> None:
+def _bounded_cache_set(cache: OrderedDict[Any, Any], key: Any, value: Any, max_size: int = CACHE_MAX_SIZE) -> None:
     """Set a cache entry with LRU eviction when size limit is reached.
     
     Args:
         cache: The OrderedDict cache to update
         key: Cache key
-        value: Cache value (can be None for CACHE_ART)
+        value: Cache value (can be None, e.g. for artwork that does not exist)
+        max_size: Maximum number of entries (defaults to CACHE_MAX_SIZE)
     
-    When cache reaches CACHE_MAX_SIZE, the oldest entry (first item) is evicted.
-    New entries are added at the end (most recently used).
+    When cache reaches max_size, the oldest entry (first item) is evicted.
+    New entries are added at the end (most recently used). Nothing is stored
+    when max_size is not positive.
     """
+    if max_size <= 0:
+        cache.pop(key, None)
+        return
     # If key exists, remove it first to update position (move to end)
     if key in cache:
         del cache[key]
-    # If cache is at max size, remove oldest entry (first item)
-    elif len(cache) >= CACHE_MAX_SIZE:
+    # If cache is at max size, remove oldest entries (first items)
+    while len(cache) >= max_size:
         cache.popitem(last=False)  # Remove oldest (first) item
     # Add new entry at end (most recently used)
     cache[key] = value
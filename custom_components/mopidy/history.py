@@ -0,0 +1,59 @@
+"""Locally recorded playback history of a Mopidy server."""
+from collections import deque
+from itertools import islice
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN, HISTORY_SAVE_DELAY_SECONDS, HISTORY_STORAGE_VERSION
+
+
+class MopidyHistory:
+    """Ring buffer of played tracks, persisted in Home Assistant storage.
+
+    Entries are kept newest first, so index 0 is the most recently played track.
+    """
+
+    def __init__(self, hass: HomeAssistant, storage_id: str, max_size: int) -> None:
+        """Initialize the history"""
+        self.hass = hass
+        self._entries: deque[dict[str, Any]] = deque(maxlen=max_size)
+        self._store: Store = Store(
+            hass, HISTORY_STORAGE_VERSION, f"{DOMAIN}.history.{storage_id}"
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def async_load(self) -> None:
+        """Load the persisted history"""
+        data = await self._store.async_load()
+        if data is not None:
+            self._entries.extend(data.get("entries", []))
+
+    def __data_to_save(self) -> dict[str, Any]:
+        """Return the history in its storage format"""
+        return {"entries": list(self._entries)}
+
+    def __schedule_save(self) -> None:
+        """Persist the history after a short delay (thread-safe)"""
+        self.hass.add_job(
+            self._store.async_delay_save, self.__data_to_save, HISTORY_SAVE_DELAY_SECONDS
+        )
+
+    def record(self, entry: dict[str, Any]) -> None:
+        """Record a played track as the most recent history entry"""
+        self._entries.appendleft(entry)
+        self.__schedule_save()
+
+    def seed(self, entries: list[dict[str, Any]]) -> None:
+        """Fill an empty history with entries fetched from the server"""
+        if len(self._entries) > 0 or len(entries) == 0:
+            return
+        self._entries.extend(entries)
+        self.__schedule_save()
+
+    def entries(self, limit: int | None = None) -> list[dict[str, Any]]:
+        """Return up to limit entries, most recent first"""
+        return list(islice(self._entries, limit))
@@ -1,5 +1,6 @@
 """Support to interact with a MopidyMusic Server."""
 import asyncio
+from collections import OrderedDict
 import logging
 from functools import partial
 import re
@@ -38,17 +39,29 @@ from homeassistant.const import (
     STATE_UNAVAILABLE,
     STATE_UNKNOWN,
 )
-from homeassistant.core import HomeAssistant, SupportsResponse
+from homeassistant.core import HomeAssistant, SupportsResponse, callback
 from homeassistant.helpers import config_validation as cv, entity_platform
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.event import async_call_later
 import homeassistant.util.dt as dt_util
 
 from .const import (
-    CACHE_ART,
+    CACHE_MAX_SIZE,
     CACHE_TITLES,
+    CONF_ART_CACHE_SIZE,
+    CONF_IMAGE_BATCH_SIZE,
+    DEFAULT_IMAGE_BATCH_SIZE,
     DEFAULT_NAME,
     DEFAULT_PORT,
     DOMAIN,
+    CONF_POLL_INTERVAL_CONNECTED,
+    CONF_POLL_INTERVAL_IDLE,
+    CONF_POLL_INTERVAL_PLAYING,
+    CONF_POLL_INTERVAL_UNAVAILABLE_MAX,
+    DEFAULT_POLL_INTERVAL_CONNECTED,
+    DEFAULT_POLL_INTERVAL_IDLE,
+    DEFAULT_POLL_INTERVAL_PLAYING,
+    DEFAULT_POLL_INTERVAL_UNAVAILABLE_MAX,
     ICON,
     SERVICE_RESTORE,
     SERVICE_SEARCH,
@@ -63,6 +76,8 @@ from .speaker import (
     MopidyLibrary,
     MopidySpeaker,
 )
+from .snapshot import DEFAULT_SNAPSHOT_SLOT
+from .stats import STATS_GROUPS, STATS_PERIODS
 
 PLAYABLE_MEDIA_TYPES = [
     MediaType.ALBUM,
@@ -94,6 +109,7 @@ PLATFORM_SCHEMA = PLATFORM_SCHEMA.extend(
 
 SEARCH_SCHEMA = {
     vol.Optional("exact"): cv.boolean,
+    vol.Optional("fuzzy"): cv.boolean,
     vol.Optional("keyword"): cv.string,
     vol.Optional("keyword_album"): cv.string,
     vol.Optional("keyword_artist"): cv.string,
@@ -102,6 +118,15 @@ SEARCH_SCHEMA = {
     vol.Optional("source"): cv.string,
 }
 
+SNAPSHOT_SCHEMA = {
+    vol.Optional("slot", default=DEFAULT_SNAPSHOT_SLOT): cv.string,
+    vol.Optional("overwrite", default=True): cv.boolean,
+}
+
+RESTORE_SCHEMA = {
+    vol.Optional("slot", default=DEFAULT_SNAPSHOT_SLOT): cv.string,
+}
+
 MOVE_TRACK_SCHEMA = {
     vol.Required("from_position"): cv.positive_int,
     vol.Required("to_position"): cv.positive_int,
@@ -112,19 +137,34 @@ REMOVE_TRACK_SCHEMA = {
     vol.Optional("positions"): [cv.positive_int],
 }
 
-FILTER_TRACKS_SCHEMA = {
-    vol.Required("criteria"): {
+FILTER_CRITERIA_SCHEMA = vol.Schema(
+    {
         vol.Optional("artist"): cv.string,
         vol.Optional("album"): cv.string,
         vol.Optional("genre"): cv.string,
         vol.Optional("track_name"): cv.string,
-    },
+        vol.Optional("regex", default=False): cv.boolean,
+        vol.Optional("any_artist", default=False): cv.boolean,
+        vol.Optional("min_duration"): cv.positive_int,
+        vol.Optional("max_duration"): cv.positive_int,
+    }
+)
+
+FILTER_TRACKS_SCHEMA = {
+    vol.Required("criteria"): vol.Any(FILTER_CRITERIA_SCHEMA, [FILTER_CRITERIA_SCHEMA]),
+    vol.Optional("dry_run", default=False): cv.boolean,
 }
 
 GET_HISTORY_SCHEMA = {
     vol.Optional("limit", default=20): cv.positive_int,
 }
 
+GET_PLAY_STATS_SCHEMA = {
+    vol.Optional("group_by", default="track"): vol.In(STATS_GROUPS),
+    vol.Optional("period", default="week"): vol.In(list(STATS_PERIODS)),
+    vol.Optional("limit", default=10): cv.positive_int,
+}
+
 PLAY_FROM_HISTORY_SCHEMA = {
     vol.Required("index"): cv.positive_int,
 }
@@ -143,10 +183,18 @@ SAVE_PLAYLIST_SCHEMA = {
 
 REFRESH_PLAYLISTS_SCHEMA = {}
 
+REFRESH_LIBRARY_SCHEMA = {
+    vol.Optional("uri"): cv.string,
+}
+
 LOOKUP_TRACK_SCHEMA = {
     vol.Required("uri"): cv.string,
 }
 
+LOOKUP_TRACKS_SCHEMA = {
+    vol.Required("uris"): vol.All(cv.ensure_list, [cv.string]),
+}
+
 FIND_EXACT_SCHEMA = {
     vol.Required("query"): {
         vol.Optional("artist"): cv.string,
@@ -160,6 +208,31 @@ PLAY_TRACK_AT_POSITION_SCHEMA = {
 }
 
 
+def build_search_query(**kwargs: Any) -> tuple[list[str], dict[str, list[str]]]:
+    """Return the sources and Mopidy query for the search service fields."""
+    query = {}
+    if isinstance(kwargs.get("keyword"), str):
+        query["any"] = [kwargs["keyword"].strip()]
+
+    if isinstance(kwargs.get("keyword_album"), str):
+        query["album"] = [kwargs["keyword_album"].strip()]
+
+    if isinstance(kwargs.get("keyword_artist"), str):
+        query["artist"] = [kwargs["keyword_artist"].strip()]
+
+    if isinstance(kwargs.get("keyword_genre"), str):
+        query["genre"] = [kwargs["keyword_genre"].strip()]
+
+    if isinstance(kwargs.get("keyword_track_name"), str):
+        query["track_name"] = [kwargs["keyword_track_name"].strip()]
+
+    sources = []
+    if isinstance(kwargs.get("source"), str):
+        sources = kwargs["source"].split(",")
+
+    return sources, query
+
+
 def media_source_filter(item: BrowseMedia):
     """Filter media sources."""
     return item.media_content_type.startswith("audio/")
@@ -183,12 +256,13 @@ async def async_setup_entry(
     port = config_entry.data[CONF_PORT]
 
     speaker = MopidySpeaker(hass, hostname, port)
-    entity = MopidyMediaPlayerEntity(speaker, device_name, device_uuid)
+    entity = MopidyMediaPlayerEntity(speaker, device_name, device_uuid, config_entry.options)
+    hass.data.setdefault(DOMAIN, {})[config_entry.entry_id] = entity
     async_add_entities([entity])
 
     platform = entity_platform.async_get_current_platform()
 
-    platform.async_register_entity_service(SERVICE_RESTORE, {}, "service_restore")
+    platform.async_register_entity_service(SERVICE_RESTORE, RESTORE_SCHEMA, "service_restore")
     platform.async_register_entity_service(
         SERVICE_SEARCH,
         SEARCH_SCHEMA,
@@ -200,7 +274,7 @@ async def async_setup_entry(
         "service_get_search_result",
         supports_response=SupportsResponse.ONLY,
     )
-    platform.async_register_entity_service(SERVICE_SNAPSHOT, {}, "service_snapshot")
+    platform.async_register_entity_service(SERVICE_SNAPSHOT, SNAPSHOT_SCHEMA, "service_snapshot")
     platform.async_register_entity_service(
         SERVICE_SET_CONSUME_MODE,
         {vol.Required("consume_mode", default=False): cv.boolean},
@@ -220,6 +294,7 @@ async def async_setup_entry(
         "filter_tracks",
         FILTER_TRACKS_SCHEMA,
         "service_filter_tracks",
+        supports_response=SupportsResponse.OPTIONAL,
     )
     platform.async_register_entity_service(
         "get_history",
@@ -227,6 +302,12 @@ async def async_setup_entry(
         "service_get_history",
         supports_response=SupportsResponse.ONLY,
     )
+    platform.async_register_entity_service(
+        "get_play_stats",
+        GET_PLAY_STATS_SCHEMA,
+        "service_get_play_stats",
+        supports_response=SupportsResponse.ONLY,
+    )
     platform.async_register_entity_service(
         "play_from_history",
         PLAY_FROM_HISTORY_SCHEMA,
@@ -252,12 +333,23 @@ async def async_setup_entry(
         REFRESH_PLAYLISTS_SCHEMA,
         "service_refresh_playlists",
     )
+    platform.async_register_entity_service(
+        "refresh_library",
+        REFRESH_LIBRARY_SCHEMA,
+        "service_refresh_library",
+    )
     platform.async_register_entity_service(
         "lookup_track",
         LOOKUP_TRACK_SCHEMA,
         "service_lookup_track",
         supports_response=SupportsResponse.ONLY,
     )
+    platform.async_register_entity_service(
+        "lookup_tracks",
+        LOOKUP_TRACKS_SCHEMA,
+        "service_lookup_tracks",
+        supports_response=SupportsResponse.ONLY,
+    )
     platform.async_register_entity_service(
         "find_exact",
         FIND_EXACT_SCHEMA,
@@ -294,6 +386,7 @@ async def async_setup_platform(
 
     speaker = MopidySpeaker(hass, hostname, port)
     entity = MopidyMediaPlayerEntity(speaker, device_name)
+    hass.data.setdefault(DOMAIN, {})[entity.unique_id] = entity
     async_add_entities([entity], True)
 
 
@@ -303,16 +396,25 @@ class MopidyMediaPlayerEntity(MediaPlayerEntity):
     _attr_name = None
     _attr_media_content_type = MediaType.MUSIC
     _attr_device_class = MediaPlayerDeviceClass.SPEAKER
+    # Polled on an adaptive schedule, so the state is only written when it changed
+    _attr_should_poll = False
 
     _attr_consume_mode: bool | None = None
     speaker: MopidySpeaker | None = None
 
-    def __init__(self, speaker, device_name, device_uuid=None) -> None:
+    def __init__(self, speaker, device_name, device_uuid=None, options=None) -> None:
         """Initialize the Mopidy device."""
 
         self.speaker = speaker
         self.speaker.entity = self
         self.device_name = device_name
+        self._written_fingerprint = None
+        self._refreshing = False
+        self._refresh_pending = False
+        self._art_cache: OrderedDict[str, str | None] = OrderedDict()
+        self._cancel_poll = None
+        self._unavailable_interval = None
+        self.apply_options(options or {})
 
         if device_uuid is None:
             self.device_uuid = re.sub(r"[._-]+", "_", self.speaker.hostname) + "_" + str(self.speaker.port)
@@ -371,94 +473,209 @@ class MopidyMediaPlayerEntity(MediaPlayerEntity):
         await self.hass.async_add_executor_job(
             partial(self.speaker.play_media , media_type, media_id, **kwargs)
         )
+        self.__refresh_after_command()
+
+    async def async_added_to_hass(self) -> None:
+        """Load persisted speaker state when the entity is added."""
+        await self.speaker.async_setup()
+        self._async_schedule_poll()
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Stop polling, listening to the Mopidy Server events and serving the domain services."""
+        if self._cancel_poll is not None:
+            self._cancel_poll()
+            self._cancel_poll = None
+        self.speaker.async_shutdown()
+        entities = self.hass.data.get(DOMAIN, {})
+        for key in [key for key, entity in entities.items() if entity is self]:
+            del entities[key]
+
+    def apply_options(self, options: dict[str, Any]) -> None:
+        """Apply the options of the config entry."""
+        self.poll_interval_playing = options.get(CONF_POLL_INTERVAL_PLAYING, DEFAULT_POLL_INTERVAL_PLAYING)
+        self.poll_interval_connected = options.get(CONF_POLL_INTERVAL_CONNECTED, DEFAULT_POLL_INTERVAL_CONNECTED)
+        self.poll_interval_idle = options.get(CONF_POLL_INTERVAL_IDLE, DEFAULT_POLL_INTERVAL_IDLE)
+        self.poll_interval_unavailable_max = options.get(
+            CONF_POLL_INTERVAL_UNAVAILABLE_MAX, DEFAULT_POLL_INTERVAL_UNAVAILABLE_MAX
+        )
+        self.art_cache_size = options.get(CONF_ART_CACHE_SIZE, CACHE_MAX_SIZE)
+        while len(self._art_cache) > self.art_cache_size:
+            self._art_cache.popitem(last=False)
+        self.image_batch_size = options.get(CONF_IMAGE_BATCH_SIZE, DEFAULT_IMAGE_BATCH_SIZE)
+        self.speaker.apply_options(options)
+        if self.hass is not None:
+            self._async_schedule_poll()
+
+    def _poll_interval(self) -> float:
+        """Return the seconds until the next poll, based on the player state."""
+        if not self.speaker.is_available:
+            # Backed off by _async_refresh after every failed poll
+            return self._unavailable_interval or self.poll_interval_playing
+
+        playing = self.speaker.state == MediaPlayerState.PLAYING
+        if not self.speaker.websocket_connected:
+            return self.poll_interval_playing if playing else self.poll_interval_connected
+        return self.poll_interval_connected if playing else self.poll_interval_idle
+
+    def __advance_unavailable_backoff(self) -> None:
+        """Double the poll interval after a failed poll, reset it after a good one."""
+        if self.speaker.is_available:
+            self._unavailable_interval = None
+        elif self._unavailable_interval is None:
+            self._unavailable_interval = self.poll_interval_playing
+        else:
+            self._unavailable_interval = min(
+                self._unavailable_interval * 2, self.poll_interval_unavailable_max
+            )
+
+    @callback
+    def _async_schedule_poll(self) -> None:
+        """(Re)schedule the next poll."""
+        if self._cancel_poll is not None:
+            self._cancel_poll()
+        self._cancel_poll = async_call_later(self.hass, self._poll_interval(), self._async_refresh)
 
     def force_update_ha_state(self) -> None:
         """Force update of Home Assistant state."""
-        self.schedule_update_ha_state(force_refresh=True)
+        self.hass.add_job(self._async_refresh)
+
+    def __refresh_after_command(self) -> None:
+        """Refresh the state after a command, unless a websocket event will report it."""
+        if not self.speaker.websocket_connected:
+            self.force_update_ha_state()
+
+    async def _async_refresh(self, now: dt.datetime | None = None) -> None:
+        """Poll the Mopidy Server and write the state if it changed."""
+        if self._refreshing:
+            # The running refresh may have read the state from before the
+            # request, refresh once more when it is done
+            self._refresh_pending = True
+            return
+
+        self._refreshing = True
+        try:
+            self._refresh_pending = True
+            while self._refresh_pending:
+                self._refresh_pending = False
+                await self.hass.async_add_executor_job(self.update)
+            self.__advance_unavailable_backoff()
+        finally:
+            self._refreshing = False
+            self._async_schedule_poll()
+        self.async_write_ha_state_if_changed()
+
+    @callback
+    def async_write_ha_state_if_changed(self) -> None:
+        """Write the state, unless nothing observable changed since the last write."""
+        fingerprint = self.speaker.state_fingerprint
+        if fingerprint == self._written_fingerprint:
+            return
+        self._written_fingerprint = fingerprint
+        self.async_write_ha_state()
 
     def clear_playlist(self) -> None:
         """Clear players playlist."""
         self.speaker.clear_queue()
+        self.__refresh_after_command()
 
     def media_next_track(self) -> None:
         """Send next track command."""
         self.speaker.media_next_track()
+        self.__refresh_after_command()
 
     def media_pause(self) -> None:
         """Send pause command."""
         self.speaker.media_pause()
+        self.__refresh_after_command()
 
     def media_play(self) -> None:
         """Send play command."""
         self.speaker.media_play()
+        self.__refresh_after_command()
 
     def media_previous_track(self) -> None:
         """Send previous track command."""
         self.speaker.media_previous_track()
+        self.__refresh_after_command()
 
     def media_seek(self, position: float) -> None:
         """Send seek command."""
         self.speaker.media_seek(int(position * 1000))
+        self.__refresh_after_command()
 
     def media_stop(self) -> None:
         """Send stop command."""
         self.speaker.media_stop()
+        self.__refresh_after_command()
 
     def mute_volume(self, mute: bool) -> None:
         """Mute the volume."""
         self.speaker.set_mute(mute)
+        self.__refresh_after_command()
 
     def select_source(self, source: str) -> None:
         """Select input source."""
         self.speaker.select_source(source)
+        self.__refresh_after_command()
 
-    async def service_restore(self) -> None:
+    async def service_restore(self, **kwargs: Any) -> None:
         """Restore Mopidy Server snapshot."""
-        await self.speaker.restore_snapshot()
+        await self.speaker.restore_snapshot(kwargs.get("slot", DEFAULT_SNAPSHOT_SLOT))
+        self.__refresh_after_command()
 
     def service_search(self, **kwargs: Any) -> None:
         """Search the Mopidy Server media library."""
         self.speaker.queue_tracks(
-            self._search(**kwargs)
+            self.search_uris(**kwargs)
         )
+        self.__refresh_after_command()
 
     def service_get_search_result(self, **kwargs: Any) -> dict[str, Any]:
         """Get search results without adding to queue."""
-        return {'result': self._search(**kwargs)}
-
-    def _search(self, **kwargs: Any) -> list[str]:
-        query = {}
-        if isinstance(kwargs.get("keyword"), str):
-            query["any"] = [kwargs["keyword"].strip()]
-
-        if isinstance(kwargs.get("keyword_album"), str):
-            query["album"] = [kwargs["keyword_album"].strip()]
+        if kwargs.get("fuzzy", False):
+            ranked = self._fuzzy_search(**kwargs)
+            return {
+                'result': [uri for uri, _ in ranked],
+                'scores': [{'uri': uri, 'score': score} for uri, score in ranked],
+            }
+        return {'result': self.search_uris(**kwargs)}
 
-        if isinstance(kwargs.get("keyword_artist"), str):
-            query["artist"] = [kwargs["keyword_artist"].strip()]
+    def search_uris(self, **kwargs: Any) -> list[str]:
+        """Return the uris of the tracks matching the search service arguments."""
+        if kwargs.get("fuzzy", False):
+            return [uri for uri, _ in self._fuzzy_search(**kwargs)]
 
-        if isinstance(kwargs.get("keyword_genre"), str):
-            query["genre"] = [kwargs["keyword_genre"].strip()]
+        sources, query = build_search_query(**kwargs)
+        if len(query.keys()) == 0:
+            return []
 
-        if isinstance(kwargs.get("keyword_track_name"), str):
-            query["track_name"] = [kwargs["keyword_track_name"].strip()]
+        return self.library.search_tracks(sources, query, kwargs.get("exact", False))
 
+    def _fuzzy_search(self, **kwargs: Any) -> list[tuple[str, float | None]]:
+        sources, query = build_search_query(**kwargs)
         if len(query.keys()) == 0:
             return []
 
-        sources = []
-        if isinstance(kwargs.get("source"), str):
-            sources = kwargs["source"].split(",")
-
-        return self.library.search_tracks(sources, query, kwargs.get("exact", False))
+        ranked = self.library.fuzzy_search(query)
+        if ranked is None:
+            # The index is still being built, serve the backend search meanwhile
+            return [
+                (uri, None)
+                for uri in self.library.search_tracks(sources, query, kwargs.get("exact", False))
+            ]
+        return ranked
 
     def service_set_consume_mode(self, **kwargs: Any) -> None:
         """Set/Unset Consume mode"""
         self.speaker.set_consume_mode(kwargs.get("consume_mode", False))
+        self.__refresh_after_command()
 
-    def service_snapshot(self) -> None:
+    def service_snapshot(self, **kwargs: Any) -> None:
         """Make a snapshot of Mopidy Server."""
-        self.speaker.take_snapshot()
+        self.speaker.take_snapshot(
+            kwargs.get("slot", DEFAULT_SNAPSHOT_SLOT),
+            kwargs.get("overwrite", True),
+        )
 
     def service_move_track(self, **kwargs: Any) -> None:
         """Move a track from one position to another in the queue."""
@@ -474,11 +691,14 @@ class MopidyMediaPlayerEntity(MediaPlayerEntity):
         self.speaker.remove_track(position=position, positions=positions)
         self.force_update_ha_state()
 
-    def service_filter_tracks(self, **kwargs: Any) -> None:
+    def service_filter_tracks(self, **kwargs: Any) -> dict[str, Any]:
         """Remove tracks from the queue matching specified criteria."""
         criteria = kwargs.get("criteria", {})
-        self.speaker.filter_tracks(criteria)
-        self.force_update_ha_state()
+        dry_run = kwargs.get("dry_run", False)
+        positions = self.speaker.filter_tracks(criteria, dry_run=dry_run)
+        if not dry_run:
+            self.force_update_ha_state()
+        return {'result': positions}
 
     def service_get_history(self, **kwargs: Any) -> dict[str, Any]:
         """Get recently played tracks with metadata."""
@@ -486,6 +706,15 @@ class MopidyMediaPlayerEntity(MediaPlayerEntity):
         history = self.speaker.get_history(limit=limit)
         return {'result': history}
 
+    def service_get_play_stats(self, **kwargs: Any) -> dict[str, Any]:
+        """Get the most played tracks, artists or albums."""
+        stats = self.speaker.get_play_stats(
+            group_by=kwargs.get("group_by", "track"),
+            period=kwargs.get("period", "week"),
+            limit=kwargs.get("limit", 10),
+        )
+        return {'result': stats}
+
     def service_play_from_history(self, **kwargs: Any) -> None:
         """Play a track from playback history by index."""
         index = kwargs.get("index")
@@ -520,12 +749,27 @@ class MopidyMediaPlayerEntity(MediaPlayerEntity):
         self.speaker.refresh_playlists()
         self.force_update_ha_state()
 
+    def service_refresh_library(self, **kwargs: Any) -> None:
+        """Refresh the library and invalidate cached search results."""
+        uri = kwargs.get("uri")
+        self.speaker.refresh_library(uri)
+
     def service_lookup_track(self, **kwargs: Any) -> dict[str, Any]:
         """Get detailed track metadata for a track URI."""
         uri = kwargs.get("uri")
         metadata = self.speaker.lookup_track(uri)
         return {'result': metadata}
 
+    def service_lookup_tracks(self, **kwargs: Any) -> dict[str, Any]:
+        """Get detailed track metadata for many track URIs in one call."""
+        uris = kwargs.get("uris", [])
+        tracks = self.speaker.lookup_tracks(uris)
+        found = {track['uri'] for track in tracks}
+        return {
+            'result': tracks,
+            'not_found': [uri for uri in dict.fromkeys(uris) if uri not in found],
+        }
+
     def service_find_exact(self, **kwargs: Any) -> dict[str, Any]:
         """Find tracks matching exact criteria."""
         query = kwargs.get("query", {})
@@ -535,22 +779,27 @@ class MopidyMediaPlayerEntity(MediaPlayerEntity):
     def set_repeat(self, repeat: RepeatMode) -> None:
         """Set repeat mode."""
         self.speaker.set_repeat_mode(repeat)
+        self.__refresh_after_command()
 
     def set_shuffle(self, shuffle: bool) -> None:
         """Enable/disable shuffle mode."""
         self.speaker.set_shuffle(shuffle)
+        self.__refresh_after_command()
 
     def set_volume_level(self, volume: float) -> None:
         """Set volume level, range 0..1."""
         self.speaker.set_volume(int(volume * 100))
+        self.__refresh_after_command()
 
     def volume_down(self) -> None:
         """Turn volume down for media player."""
         self.speaker.volume_down()
+        self.__refresh_after_command()
 
     def volume_up(self) -> None:
         """Turn volume up for media player."""
         self.speaker.volume_up()
+        self.__refresh_after_command()
 
     @property
     def available(self) -> bool:
@@ -588,6 +837,9 @@ class MopidyMediaPlayerEntity(MediaPlayerEntity):
         if self.speaker.snapshot_taken_at is not None:
             attributes["snapshot_taken_at"] = self.speaker.snapshot_taken_at
 
+        if len(self.speaker.snapshot_slots) > 0:
+            attributes["snapshot_slots"] = self.speaker.snapshot_slots
+
         # Add queue_tracks attribute with full track list
         # Use cached value to avoid blocking calls in synchronous property
         if self.speaker.queue is not None and self.speaker.queue._attr_queue_tracks is not None:
@@ -762,13 +1014,10 @@ class MopidyMediaPlayerEntity(MediaPlayerEntity):
         
         Returns:
             List of history entries, each with URI, artist, album, track_name, timestamp.
-            Index 0 is the most recently played track.
+            Index 0 is the most recently played track. Served from the local history,
+            so reading this property does not query the Mopidy server.
         """
-        try:
-            return self.speaker.get_history(limit=20)
-        except Exception:
-            # If history retrieval fails, return empty list
-            return []
+        return self.speaker.get_history(limit=20)
 
     def update(self) -> None:
         """Get the latest data and update the state."""
@@ -869,7 +1118,7 @@ class MopidyMediaPlayerEntity(MediaPlayerEntity):
 
         library_info, mopidy_info = get_media_info(payload)
         if mopidy_info["art_uri"] != "library":
-            if mopidy_info["art_uri"] not in CACHE_ART:
+            if mopidy_info["art_uri"] not in self._art_cache:
                 _image_uris.append(mopidy_info["art_uri"])
 
         library_children = {}
@@ -889,7 +1138,7 @@ class MopidyMediaPlayerEntity(MediaPlayerEntity):
             if (
                 library_children[getattr(path, "uri")]["mopidy_info"] is not None
                 and library_children[getattr(path, "uri")]["mopidy_info"]["art_uri"]
-                not in CACHE_ART
+                not in self._art_cache
             ):
                 _image_uris.append(
                     library_children[getattr(path, "uri")]["mopidy_info"]["art_uri"]
@@ -897,7 +1146,7 @@ class MopidyMediaPlayerEntity(MediaPlayerEntity):
 
         if mopidy_info["source"] == "spotify":
             # Spotify thumbnail lookup is throttled
-            pagesize = 10
+            pagesize = self.image_batch_size
         else:
             pagesize = 1000
         uri_sets = [
@@ -911,23 +1160,28 @@ class MopidyMediaPlayerEntity(MediaPlayerEntity):
             i = self.library.get_images(uri_set)
             for img_uri in i:
                 if len(i[img_uri]) > 0:
-                    _bounded_cache_set(CACHE_ART, img_uri, self.speaker.queue.expand_url(mopidy_info["source"], i[img_uri][0].uri))
+                    _bounded_cache_set(
+                        self._art_cache,
+                        img_uri,
+                        self.speaker.queue.expand_url(mopidy_info["source"], i[img_uri][0].uri),
+                        max_size=self.art_cache_size,
+                    )
                 else:
-                    _bounded_cache_set(CACHE_ART, img_uri, None)
+                    _bounded_cache_set(self._art_cache, img_uri, None, max_size=self.art_cache_size)
 
         if (
-            mopidy_info["art_uri"] in CACHE_ART
-            and CACHE_ART[mopidy_info["art_uri"]] is not None
+            mopidy_info["art_uri"] in self._art_cache
+            and self._art_cache[mopidy_info["art_uri"]] is not None
         ):
-            library_info["thumbnail"] = CACHE_ART[mopidy_info["art_uri"]]
+            library_info["thumbnail"] = self._art_cache[mopidy_info["art_uri"]]
 
         for i in library_children:
             if (
                 library_children[i]["mopidy_info"] is not None
-                and library_children[i]["mopidy_info"]["art_uri"] in CACHE_ART
-                and CACHE_ART[library_children[i]["mopidy_info"]["art_uri"]] is not None
+                and library_children[i]["mopidy_info"]["art_uri"] in self._art_cache
+                and self._art_cache[library_children[i]["mopidy_info"]["art_uri"]] is not None
             ):
-                library_children[i]["library_info"]["thumbnail"] = CACHE_ART[
+                library_children[i]["library_info"]["thumbnail"] = self._art_cache[
                     library_children[i]["mopidy_info"]["art_uri"]
                 ]
 
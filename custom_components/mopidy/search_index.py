@@ -0,0 +1,228 @@
+"""Trigram index for fuzzy searches over the Mopidy library."""
+from array import array
+from bisect import bisect_left
+from collections import Counter
+import heapq
+import re
+import unicodedata
+
+INDEX_FIELDS = ("artist", "album", "track_name")
+
+# Trigrams in more than this share of the documents are not used to find candidates
+FREQUENT_GRAM_RATIO = 0.05
+# Documents scored per field and term, those sharing the most trigrams first
+MAX_CANDIDATES = 2000
+
+_NON_ALNUM = re.compile(r"[^\w]+")
+
+
+def normalize_text(value: str | None) -> str:
+    """Return a case-folded, accent-free, punctuation-free version of value"""
+    if not value:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", value.casefold())
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return _NON_ALNUM.sub(" ", stripped).replace("_", " ").strip()
+
+
+def trigrams(value: str | None) -> set[str]:
+    """Return the set of padded word trigrams of value"""
+    grams: set[str] = set()
+    for word in normalize_text(value).split():
+        padded = f"  {word} "
+        for i in range(len(padded) - 2):
+            grams.add(padded[i:i + 3])
+    return grams
+
+
+def _similarity(shared: int, query_size: int, doc_size: int) -> float:
+    """Return the similarity of a document sharing shared of the query trigrams
+
+    Blends the Dice coefficient with query containment, so short spoken
+    queries still rank well against longer titles.
+    """
+    return (2 * shared / (query_size + doc_size) + shared / query_size) / 2
+
+
+class TrigramIndex:
+    """Compact trigram index over artist, album and track names.
+
+    Every indexed track is a document id; per field, each trigram maps to an
+    array of document ids containing it. Scoring counts shared trigrams per
+    document, so a query only touches the posting lists of its own trigrams.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty index"""
+        self._uris: list[str] = []
+        self._postings: dict[str, dict[str, array]] = {field: {} for field in INDEX_FIELDS}
+        self._sizes: dict[str, array] = {field: array("H") for field in INDEX_FIELDS}
+
+    def __len__(self) -> int:
+        return len(self._uris)
+
+    def add(self, uri: str, artist: str | None, album: str | None, track_name: str | None) -> None:
+        """Add a track to the index"""
+        doc_id = len(self._uris)
+        self._uris.append(uri)
+        for field, value in zip(INDEX_FIELDS, (artist, album, track_name)):
+            grams = trigrams(value)
+            self._sizes[field].append(min(len(grams), 0xFFFF))
+            postings = self._postings[field]
+            for gram in grams:
+                ids = postings.get(gram)
+                if ids is None:
+                    ids = postings[gram] = array("I")
+                ids.append(doc_id)
+
+    def __min_shared(self, query_size: int, min_score: float) -> int:
+        """Return the fewest shared trigrams that can still reach min_score
+
+        A document scores highest when it has no trigrams besides the shared
+        ones, so that bound decides whether a shared count can qualify.
+        """
+        for shared in range(1, query_size + 1):
+            if _similarity(shared, query_size, shared) >= min_score:
+                return shared
+        return query_size + 1
+
+    def _field_hits(self, field: str, grams: set[str], min_score: float) -> tuple[Counter[int], list[array]]:
+        """Count the rarest query trigrams of the documents that may reach min_score
+
+        Prefix filtering: a document sharing at least min_shared of the query
+        trigrams shares one of its len - min_shared + 1 rarest trigrams, so
+        only their posting lists are read. Trigrams found in more than
+        FREQUENT_GRAM_RATIO of the documents are not read either; they are
+        only probed for the documents found through rarer ones.
+
+        Returns:
+            Shared counts of the read trigrams per document, and the sorted
+            posting lists of the trigrams left unread
+        """
+        postings = self._postings[field]
+        present = sorted(
+            (postings[gram] for gram in grams if gram in postings), key=len
+        )
+        min_shared = self.__min_shared(len(grams), min_score)
+        if min_shared > len(present):
+            return Counter(), []
+
+        max_postings = max(1, int(len(self._uris) * FREQUENT_GRAM_RATIO))
+        prefix = present[:len(present) - min_shared + 1]
+        read = [ids for ids in prefix if len(ids) <= max_postings] or prefix[:1]
+        unread = [ids for ids in present if not any(ids is x for x in read)]
+
+        hits: Counter[int] = Counter()
+        for ids in read:
+            hits.update(ids)
+        return hits, unread
+
+    def _term_scores(self, fields: tuple[str, ...], grams: set[str], min_score: float, limit: int | None) -> dict[int, float]:
+        """Return the documents scoring at least min_score for one query term
+
+        Documents are scored in descending order of their read trigram count,
+        which bounds their score, so once limit documents are found the rest
+        are skipped as soon as they cannot beat the limit-th best.
+
+        Args:
+            fields: Fields of which the best matching one scores
+            grams: Trigrams of the term
+            min_score: Minimum score a document must reach
+            limit: Number of best documents needed, or None for all of them
+        """
+        query_size = len(grams)
+        best: dict[int, float] = {}
+        threshold = min_score
+        for field in fields:
+            counts, unread = self._field_hits(field, grams, min_score)
+            sizes = self._sizes[field]
+            for scored, (doc_id, count) in enumerate(counts.most_common(MAX_CANDIDATES)):
+                possible = min(count + len(unread), query_size)
+                if _similarity(possible, query_size, possible) < threshold:
+                    break
+                size = sizes[doc_id]
+                if _similarity(min(possible, size), query_size, size) < threshold:
+                    continue
+                for ids in unread:
+                    pos = bisect_left(ids, doc_id)
+                    if pos < len(ids) and ids[pos] == doc_id:
+                        count += 1
+                score = _similarity(count, query_size, size)
+                if score >= min_score and score > best.get(doc_id, 0.0):
+                    best[doc_id] = score
+                if limit and scored % 64 == 63 and len(best) >= limit:
+                    threshold = max(threshold, heapq.nlargest(limit, best.values())[-1])
+        return best
+
+    def _probe_score(self, fields: tuple[str, ...], grams: set[str], doc_id: int) -> float:
+        """Return the score of one document for a query term"""
+        best = 0.0
+        for field in fields:
+            postings = self._postings[field]
+            shared = 0
+            for gram in grams:
+                ids = postings.get(gram)
+                if ids is not None:
+                    pos = bisect_left(ids, doc_id)
+                    if pos < len(ids) and ids[pos] == doc_id:
+                        shared += 1
+            if shared > 0:
+                best = max(best, _similarity(shared, len(grams), self._sizes[field][doc_id]))
+        return best
+
+    def __averages(self, terms: list[tuple[tuple[str, ...], set[str]]], scores: list[dict[int, float]]) -> dict[int, float]:
+        """Return the average term score of every document found by a term"""
+        averages: dict[int, float] = {}
+        for doc_id in set().union(*scores):
+            total = 0.0
+            for (fields, grams), term_scores in zip(terms, scores):
+                if doc_id in term_scores:
+                    total += term_scores[doc_id]
+                elif grams:
+                    total += self._probe_score(fields, grams, doc_id)
+            averages[doc_id] = total / len(terms)
+        return averages
+
+    def search(self, query: dict[str, str], limit: int, min_score: float) -> list[tuple[str, float]]:
+        """Return (uri, score) pairs ranked by descending score.
+
+        Args:
+            query: Mapping of artist, album, track_name and/or any to search text
+            limit: Maximum number of results
+            min_score: Minimum score (0..1) a result must reach
+        """
+        terms: list[tuple[tuple[str, ...], set[str]]] = []
+        for field, text in query.items():
+            if field == "any":
+                # Searching any field scores the best matching field
+                terms.append((INDEX_FIELDS, trigrams(text)))
+            elif field in INDEX_FIELDS:
+                terms.append(((field,), trigrams(text)))
+        if not any(grams for _, grams in terms):
+            return []
+
+        if len(terms) == 1:
+            totals = self._term_scores(*terms[0], min_score, limit)
+        else:
+            # The average of the terms only reaches a score when one of them
+            # does. The best documents of every term give a first limit-th
+            # best average, then every document reaching it in any term is
+            # scored; missing fields score 0.
+            totals = self.__averages(terms, [
+                self._term_scores(fields, grams, min_score, limit) if grams else {}
+                for fields, grams in terms
+            ])
+            threshold = min_score
+            if len(totals) >= limit > 0:
+                threshold = max(threshold, heapq.nlargest(limit, totals.values())[-1])
+            totals.update(self.__averages(terms, [
+                self._term_scores(fields, grams, threshold, None) if grams else {}
+                for fields, grams in terms
+            ]))
+
+        ranked = heapq.nlargest(
+            limit,
+            (item for item in totals.items() if item[1] >= min_score),
+            key=lambda item: item[1],
+        )
+        return [(self._uris[doc_id], round(score, 4)) for doc_id, score in ranked]
@@ -0,0 +1,200 @@
+"""Domain services spanning all configured Mopidy servers."""
+import asyncio
+import logging
+from typing import Any
+
+import voluptuous as vol
+
+from homeassistant.const import ATTR_ENTITY_ID
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.helpers import config_validation as cv
+
+from .const import (
+    DOMAIN,
+    GROUP_RESTORE_TIMEOUT_SECONDS,
+    SEARCH_ALL_TIMEOUT_SECONDS,
+    SERVICE_GROUP_RESTORE,
+    SERVICE_GROUP_SNAPSHOT,
+    SERVICE_SEARCH_ALL,
+)
+from .media_player import SEARCH_SCHEMA
+from .snapshot import DEFAULT_SNAPSHOT_SLOT
+
+_LOGGER = logging.getLogger(__name__)
+
+SEARCH_ALL_SCHEMA = vol.Schema(
+    {
+        **SEARCH_SCHEMA,
+        vol.Optional("timeout", default=SEARCH_ALL_TIMEOUT_SECONDS): vol.All(
+            vol.Coerce(float), vol.Range(min=0.1)
+        ),
+    }
+)
+
+GROUP_SNAPSHOT_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_ENTITY_ID): cv.comp_entity_ids,
+        vol.Optional("slot", default=DEFAULT_SNAPSHOT_SLOT): cv.string,
+        vol.Optional("overwrite", default=True): cv.boolean,
+    }
+)
+
+GROUP_RESTORE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_ENTITY_ID): cv.comp_entity_ids,
+        vol.Optional("slot", default=DEFAULT_SNAPSHOT_SLOT): cv.string,
+        vol.Optional("timeout", default=GROUP_RESTORE_TIMEOUT_SECONDS): vol.All(
+            vol.Coerce(float), vol.Range(min=0.1)
+        ),
+    }
+)
+
+
+def _registered_entities(hass: HomeAssistant) -> list[Any]:
+    """Return the Mopidy media player entities that have been added to HA"""
+    return [
+        entity
+        for entity in hass.data.get(DOMAIN, {}).values()
+        if getattr(entity, "entity_id", None) is not None
+    ]
+
+
+def _target_entities(
+    hass: HomeAssistant, entity_ids: list[str] | None
+) -> tuple[list[Any], dict[str, dict[str, Any]]]:
+    """Return the targeted entities and a result for every unknown entity_id"""
+    entities = _registered_entities(hass)
+    if entity_ids is None:
+        return entities, {}
+
+    by_id = {entity.entity_id: entity for entity in entities}
+    return (
+        [by_id[entity_id] for entity_id in entity_ids if entity_id in by_id],
+        {
+            entity_id: {"error": "not a Mopidy media player"}
+            for entity_id in entity_ids
+            if entity_id not in by_id
+        },
+    )
+
+
+def _search_server(entity: Any, timeout: float, query: dict[str, Any]) -> list[str]:
+    """Search a single server, its calls answering within timeout seconds
+
+    The executor job is not cancelled when the service gives up waiting, the
+    read timeout ends it instead.
+    """
+    speaker = entity.speaker
+    with speaker.api.long_running_calls(timeout=(speaker.rpc_timeout[0], timeout)):
+        return entity.search_uris(**query)
+
+
+async def _async_search_server(entity: Any, timeout: float, query: dict[str, Any]) -> list[str]:
+    """Search a single server, giving up after timeout seconds"""
+    if not entity.speaker.is_available:
+        raise ConnectionError("server is unavailable")
+
+    return await asyncio.wait_for(
+        entity.hass.async_add_executor_job(_search_server, entity, timeout, query),
+        timeout,
+    )
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the Mopidy domain services"""
+
+    async def async_search_all(call: ServiceCall) -> ServiceResponse:
+        """Search every Mopidy server concurrently and merge the results"""
+        query = dict(call.data)
+        timeout = query.pop("timeout")
+        entities = _registered_entities(hass)
+
+        results = await asyncio.gather(
+            *[_async_search_server(entity, timeout, query) for entity in entities],
+            return_exceptions=True,
+        )
+
+        merged: dict[str, list[str]] = {}
+        servers: dict[str, dict[str, Any]] = {}
+        for entity, result in zip(entities, results):
+            if isinstance(result, BaseException):
+                error = "timeout" if isinstance(result, asyncio.TimeoutError) else str(result)
+                _LOGGER.warning("search_all failed for %s: %s", entity.entity_id, error)
+                servers[entity.entity_id] = {"error": error}
+                continue
+
+            servers[entity.entity_id] = {"count": len(result)}
+            for uri in result:
+                merged.setdefault(uri, []).append(entity.entity_id)
+
+        return {
+            "result": [{"uri": uri, "servers": found_on} for uri, found_on in merged.items()],
+            "servers": servers,
+        }
+
+    async def async_group_snapshot(call: ServiceCall) -> ServiceResponse:
+        """Snapshot every targeted Mopidy server"""
+        entities, servers = _target_entities(hass, call.data.get(ATTR_ENTITY_ID))
+        for entity in entities:
+            # Captured from the mirrored state, no server round-trip is needed
+            try:
+                stored = entity.speaker.take_snapshot(call.data["slot"], call.data["overwrite"])
+            except ValueError as error:
+                _LOGGER.warning("group_snapshot failed for %s: %s", entity.entity_id, str(error))
+                servers[entity.entity_id] = {"error": str(error)}
+                continue
+            servers[entity.entity_id] = {"result": "stored" if stored else "kept"}
+
+        return {"servers": servers}
+
+    async def async_group_restore(call: ServiceCall) -> ServiceResponse:
+        """Restore the snapshots of every targeted Mopidy server concurrently"""
+        entities, servers = _target_entities(hass, call.data.get(ATTR_ENTITY_ID))
+        slot = call.data["slot"]
+
+        results = await asyncio.gather(
+            *[
+                asyncio.wait_for(entity.speaker.restore_snapshot(slot), call.data["timeout"])
+                for entity in entities
+            ],
+            return_exceptions=True,
+        )
+
+        for entity, result in zip(entities, results):
+            if isinstance(result, BaseException):
+                error = "timeout" if isinstance(result, asyncio.TimeoutError) else str(result)
+                _LOGGER.warning("group_restore failed for %s: %s", entity.entity_id, error)
+                servers[entity.entity_id] = {"error": error}
+            else:
+                servers[entity.entity_id] = {"result": "restored"}
+
+        return {"servers": servers}
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GROUP_SNAPSHOT,
+        async_group_snapshot,
+        schema=GROUP_SNAPSHOT_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GROUP_RESTORE,
+        async_group_restore,
+        schema=GROUP_RESTORE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SEARCH_ALL,
+        async_search_all,
+        schema=SEARCH_ALL_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
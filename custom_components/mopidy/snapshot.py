@@ -0,0 +1,98 @@
+"""Named, persisted playback snapshots of a Mopidy server."""
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN, SNAPSHOT_SAVE_DELAY_SECONDS, SNAPSHOT_STORAGE_VERSION
+
+DEFAULT_SNAPSHOT_SLOT = "default"
+
+
+def compact_snapshot(snapshot: dict[str, Any]) -> dict[str, Any]:
+    """Return the storage format of a snapshot.
+
+    The queue is stored as its distinct URIs plus the index of every queue
+    entry into that list, so repeated tracks are only stored once.
+    """
+    uris: list[str] = []
+    indexes: dict[str, int] = {}
+    order: list[int] = []
+    for uri in snapshot.get("queue_list", []):
+        if uri not in indexes:
+            indexes[uri] = len(uris)
+            uris.append(uri)
+        order.append(indexes[uri])
+
+    data = {k: v for k, v in snapshot.items() if k != "queue_list"}
+    data["uris"] = uris
+    data["order"] = order
+    return data
+
+
+def expand_snapshot(data: dict[str, Any]) -> dict[str, Any]:
+    """Return the snapshot stored in its compact format"""
+    uris = data.get("uris", [])
+    snapshot = {k: v for k, v in data.items() if k not in ["uris", "order"]}
+    snapshot["queue_list"] = [uris[i] for i in data.get("order", [])]
+    return snapshot
+
+
+class MopidySnapshots:
+    """Snapshot slots of a speaker, persisted in Home Assistant storage."""
+
+    def __init__(self, hass: HomeAssistant, storage_id: str) -> None:
+        """Initialize the snapshot slots"""
+        self.hass = hass
+        self._slots: dict[str, dict[str, Any]] = {}
+        self.version = 0
+        self._store: Store = Store(
+            hass, SNAPSHOT_STORAGE_VERSION, f"{DOMAIN}.snapshots.{storage_id}"
+        )
+
+    def __contains__(self, slot: str) -> bool:
+        return slot in self._slots
+
+    async def async_load(self) -> None:
+        """Load the persisted snapshots"""
+        data = await self._store.async_load()
+        if data is not None:
+            self._slots.update(data.get("slots", {}))
+            self.version += 1
+
+    def __data_to_save(self) -> dict[str, Any]:
+        """Return the snapshots in their storage format"""
+        return {"slots": self._slots}
+
+    def __schedule_save(self) -> None:
+        """Persist the snapshots after a short delay (thread-safe)"""
+        self.hass.add_job(
+            self._store.async_delay_save, self.__data_to_save, SNAPSHOT_SAVE_DELAY_SECONDS
+        )
+
+    @property
+    def slots(self) -> list[str]:
+        """Return the names of the stored snapshots"""
+        return list(self._slots)
+
+    def get(self, slot: str) -> dict[str, Any] | None:
+        """Return the snapshot stored in slot"""
+        data = self._slots.get(slot)
+        return None if data is None else expand_snapshot(data)
+
+    def taken_at(self, slot: str) -> str | None:
+        """Return the ISO time the snapshot in slot was taken at"""
+        data = self._slots.get(slot)
+        return None if data is None else data.get("taken_at")
+
+    def store(self, slot: str, snapshot: dict[str, Any]) -> None:
+        """Store a snapshot in slot, replacing any previous one"""
+        self._slots[slot] = compact_snapshot(snapshot)
+        self.version += 1
+        self.__schedule_save()
+
+    def remove(self, slot: str) -> None:
+        """Remove the snapshot stored in slot"""
+        if self._slots.pop(slot, None) is not None:
+            self.version += 1
+            self.__schedule_save()
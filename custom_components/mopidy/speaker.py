@@ -1,11 +1,18 @@
 """Base classes for common mopidy speaker tasks.."""
 import asyncio
+from collections import OrderedDict
+from functools import partial
 import logging
 import datetime
+import hashlib
+import re
+import threading
+import time
 import urllib.parse as urlparse
 from urllib.parse import urlencode
 from typing import Any
 from mopidyapi import MopidyAPI
+from mopidyapi.exceptions import MopidyError
 
 from homeassistant.components import media_source, spotify
 from homeassistant.core import HomeAssistant, callback
@@ -25,28 +32,402 @@ import homeassistant.util.dt as dt_util
 from requests.exceptions import ConnectionError as reConnectionError
 
 from .const import (
+    CONF_QUEUE_ATTRIBUTE_WINDOW,
+    CONF_RESTORE_TIMEOUT,
+    CONF_RPC_CONNECT_TIMEOUT,
+    CONF_RPC_LONG_TIMEOUT,
+    CONF_RPC_TIMEOUT,
+    CONF_SEARCH_CACHE_SIZE,
+    CONF_TRACK_CACHE_SIZE,
+    CONF_UPDATE_DEADLINE,
+    CONF_UPDATE_MODE,
+    CONF_VOLUME_STEP,
     DEFAULT_PORT,
-    RESTORE_RETRY_MAX,
-    RESTORE_RETRY_INTERVAL_SECONDS,
+    DEFAULT_QUEUE_ATTRIBUTE_WINDOW,
+    DIRECTORY_BROWSE_BATCH_SIZE,
+    DIRECTORY_MAX_BROWSED,
+    DIRECTORY_MAX_DEPTH,
+    DIRECTORY_MAX_TRACKS,
+    ENQUEUE_BATCH_SIZE,
+    EVENT_COALESCE_SECONDS,
+    FUZZY_INDEX_BROWSE_URI,
+    FUZZY_INDEX_LOOKUP_BATCH,
+    FUZZY_SEARCH_MAX_RESULTS,
+    FUZZY_SEARCH_MIN_SCORE,
+    HISTORY_MAX_SIZE,
+    IMAGE_CACHE_MAX_SIZE,
+    IMAGE_PREFETCH_TRACKS,
+    POSITION_DRIFT_CHECK_SECONDS,
+    RESTORE_TIMEOUT_SECONDS,
+    RPC_CONNECT_TIMEOUT_SECONDS,
+    RPC_LONG_TIMEOUT_SECONDS,
+    RPC_TIMEOUT_SECONDS,
+    SEARCH_CACHE_MAX_SIZE,
+    SEARCH_CACHE_TTL_SECONDS,
+    TRACK_CACHE_MAX_SIZE,
+    UPDATE_DEADLINE_SECONDS,
+    UPDATE_MODE_PUSH,
     VOLUME_STEP_PERCENT,
+    _bounded_cache_set,
 )
+from .api import CircuitBreaker, MopidyClient
+from .history import MopidyHistory
+from .search_index import TrigramIndex
+from .snapshot import DEFAULT_SNAPSHOT_SLOT, MopidySnapshots
+from .stats import MopidyPlayStats
+from .websocket import MopidyEventQueue, async_get_websocket_manager
 
 _LOGGER = logging.getLogger(__name__)
 
+# Kinds of state refreshed after websocket events, see MopidySpeaker.__mark_dirty
+DIRTY_CURRENT_TRACK = "current_track"
+DIRTY_IMAGE = "image"
+DIRTY_OPTIONS = "options"
+DIRTY_PLAYLISTS = "playlists"
+DIRTY_QUEUE = "queue"
+DIRTY_STATE = "state"
+
+
 class MissingMediaInformation(BrowseError):
     """Missing media required information."""
 
+def search_cache_key(kind: str, sources: list[str] | None, query: dict[str, list[str]] | None, exact: bool) -> tuple:
+    """Return a normalized, hashable key for a search request.
+
+    Field values are trimmed and case-folded, and fields, values and sources are
+    sorted, so equivalent queries share a single cache entry.
+    """
+    fields = tuple(sorted(
+        (
+            field,
+            tuple(sorted(str(value).strip().casefold() for value in values if value is not None)),
+        )
+        for field, values in (query or {}).items()
+    ))
+    return (
+        kind,
+        fields,
+        tuple(sorted(str(source).strip().casefold() for source in (sources or []))),
+        bool(exact),
+    )
+
+def playlist_content_hash(uris: list[str]) -> str:
+    """Return a digest of the ordered track URIs of a playlist"""
+    return hashlib.sha1("\n".join(uris).encode()).hexdigest()
+
+def normalize_track(track: Any, uri: str | None = None) -> dict[str, Any]:
+    """Return the normalized metadata of a Mopidy track object.
+
+    Besides the fields returned by the lookup services, the result carries the
+    pre-joined ``artist``, ``first_artist`` and ``album_name`` strings and the
+    ``duration`` in seconds, so consumers do not have to derive them again.
+    """
+    artists = [
+        {'name': artist.name, 'uri': getattr(artist, 'uri', None)} if hasattr(artist, 'name') else {'uri': getattr(artist, 'uri', None)}
+        for artist in (getattr(track, 'artists', None) or [])
+    ]
+    album = getattr(track, 'album', None)
+    album_info = None
+    if album:
+        album_info = {
+            'name': getattr(album, 'name', None),
+            'uri': getattr(album, 'uri', None),
+            'date': getattr(album, 'date', None),
+        }
+    length = getattr(track, 'length', None)
+    artist_names = [x['name'] for x in artists if 'name' in x]
+
+    return {
+        'uri': getattr(track, 'uri', uri),
+        'name': getattr(track, 'name', None),
+        'artists': artists,
+        'album': album_info,
+        'length': length,
+        'track_no': getattr(track, 'track_no', None),
+        'date': getattr(track, 'date', None),
+        'genre': getattr(track, 'genre', None),
+        'artist': ", ".join(artist_names) if artist_names else None,
+        'first_artist': artist_names[0] if artist_names else None,
+        'album_name': album_info['name'] if album_info else None,
+        'duration': int(length / 1000) if length is not None else None,
+    }
+
+LOOKUP_TRACK_FIELDS = ('uri', 'name', 'artists', 'album', 'length', 'track_no', 'date', 'genre')
+
 class MopidyLibrary:
     """Representation of the current Mopidy library."""
 
     api: MopidyAPI | None = None
+    hass: HomeAssistant | None = None
     _attr_supported_uri_schemes: list[str] | None = None
 
+    def __init__(self):
+        """Initialize library"""
+        self._search_cache: OrderedDict[tuple, tuple[float, list[str]]] = OrderedDict()
+        self._search_cache_lock = threading.Lock()
+        self._fuzzy_index: TrigramIndex | None = None
+        self._fuzzy_index_lock = threading.Lock()
+        self._fuzzy_index_building = False
+        self._fuzzy_index_generation = 0
+        self._track_cache: OrderedDict[str, dict[str, Any]] = OrderedDict()
+        self._track_cache_lock = threading.Lock()
+        self.search_cache_size = SEARCH_CACHE_MAX_SIZE
+        self.track_cache_size = TRACK_CACHE_MAX_SIZE
+
+    def __cache_track(self, metadata: dict[str, Any]) -> None:
+        """Store normalized track metadata in the bounded track cache"""
+        with self._track_cache_lock:
+            _bounded_cache_set(
+                self._track_cache, metadata['uri'], metadata, max_size=self.track_cache_size
+            )
+
+    def cached_track(self, uri: str | None) -> dict[str, Any] | None:
+        """Return cached metadata for a track uri, if known"""
+        if uri is None:
+            return None
+        with self._track_cache_lock:
+            metadata = self._track_cache.get(uri)
+            if metadata is not None:
+                self._track_cache.move_to_end(uri)
+        return metadata
+
+    def track_metadata(self, track: Any) -> dict[str, Any]:
+        """Return normalized metadata for a track object, normalizing once per uri"""
+        uri = getattr(track, 'uri', None)
+        metadata = self.cached_track(uri)
+        if metadata is None:
+            metadata = normalize_track(track)
+            if uri is not None:
+                self.__cache_track(metadata)
+        return metadata
+
+    def lookup_tracks(self, uris: list[str]) -> dict[str, dict[str, Any]]:
+        """Return normalized metadata for many uris
+
+        Uris missing from the track cache are resolved with a single
+        library.lookup call. Uris unknown to the server are left out.
+        """
+        found: dict[str, dict[str, Any]] = {}
+        missing: list[str] = []
+        for uri in uris:
+            metadata = self.cached_track(uri)
+            if metadata is not None:
+                found[uri] = metadata
+            elif uri not in missing:
+                missing.append(uri)
+
+        if len(missing) > 0:
+            result = self.api.library.lookup(uris=missing) or {}
+            for uri in missing:
+                tracks = result.get(uri) or []
+                if len(tracks) == 0 or not tracks[0]:
+                    continue
+                metadata = normalize_track(tracks[0], uri)
+                self.__cache_track(metadata)
+                found[uri] = metadata
+
+        return found
+
+    def cached_search_result(self, key: tuple) -> list[str] | None:
+        """Return a cached search result, or None when missing or expired"""
+        with self._search_cache_lock:
+            entry = self._search_cache.get(key)
+            if entry is None:
+                return None
+
+            expires_at, uris = entry
+            if expires_at < time.monotonic():
+                del self._search_cache[key]
+                return None
+
+            self._search_cache.move_to_end(key)
+        return list(uris)
+
+    def cache_search_result(self, key: tuple, uris: list[str]) -> None:
+        """Store a search result in the bounded search cache"""
+        with self._search_cache_lock:
+            _bounded_cache_set(
+                self._search_cache,
+                key,
+                (time.monotonic() + SEARCH_CACHE_TTL_SECONDS, list(uris)),
+                max_size=self.search_cache_size,
+            )
+
+    def clear_search_cache(self) -> None:
+        """Drop all cached search results"""
+        with self._search_cache_lock:
+            self._search_cache.clear()
+
+    def clear_fuzzy_index(self) -> None:
+        """Drop the fuzzy search index, discarding any build in progress"""
+        with self._fuzzy_index_lock:
+            self._fuzzy_index = None
+            self._fuzzy_index_generation += 1
+
+    def clear_track_cache(self) -> None:
+        """Drop all cached track metadata"""
+        with self._track_cache_lock:
+            self._track_cache.clear()
+
+    def __build_fuzzy_index(self) -> TrigramIndex:
+        """Index artist, album and track names of the local library"""
+        index = TrigramIndex()
+        if "local" not in self.supported_uri_schemes:
+            return index
+
+        with self.api.long_running_calls():
+            names = {
+                ref.uri: getattr(ref, "name", None)
+                for ref in self.browse(FUZZY_INDEX_BROWSE_URI)
+                if getattr(ref, "type", None) == "track"
+            }
+        uris = list(names)
+        for start in range(0, len(uris), FUZZY_INDEX_LOOKUP_BATCH):
+            batch = uris[start:start + FUZZY_INDEX_LOOKUP_BATCH]
+            # Resolved directly: indexing the whole library would evict the track cache
+            with self.api.long_running_calls():
+                result = self.api.library.lookup(uris=batch) or {}
+            for uri in batch:
+                tracks = result.get(uri) or []
+                metadata = normalize_track(tracks[0], uri) if len(tracks) > 0 and tracks[0] else {}
+                index.add(
+                    uri,
+                    metadata.get("artist"),
+                    metadata.get("album_name"),
+                    metadata.get("name") or names[uri],
+                )
+
+        _LOGGER.debug("Built fuzzy search index with %d tracks", len(index))
+        return index
+
+    def __fuzzy_index_job(self, generation: int) -> None:
+        """Build the fuzzy search index in the executor"""
+        index = None
+        try:
+            index = self.__build_fuzzy_index()
+        except Exception as error:
+            _LOGGER.warning("Could not build the fuzzy search index: %s", error)
+        finally:
+            with self._fuzzy_index_lock:
+                self._fuzzy_index_building = False
+                if generation == self._fuzzy_index_generation:
+                    self._fuzzy_index = index
+
+    def start_fuzzy_index_build(self) -> None:
+        """Build the fuzzy search index in the background, unless built or building"""
+        with self._fuzzy_index_lock:
+            if self._fuzzy_index is not None or self._fuzzy_index_building:
+                return
+            self._fuzzy_index_building = True
+            generation = self._fuzzy_index_generation
+        self.hass.add_job(self.__fuzzy_index_job, generation)
+
+    def fuzzy_search(self, query: dict[str, list[str]] | None = None, limit: int = FUZZY_SEARCH_MAX_RESULTS) -> list[tuple[str, float]] | None:
+        """Search the local library index for approximate matches
+
+        Returns (uri, score) pairs, best match first, or None while the index
+        is not built yet. The first fuzzy search starts building the index in
+        the background; it is kept across reconnects and dropped again when
+        the library is refreshed.
+        """
+        with self._fuzzy_index_lock:
+            index = self._fuzzy_index
+        if index is None:
+            self.start_fuzzy_index_build()
+            return None
+
+        return index.search(
+            { field: " ".join(values) for field, values in (query or {}).items() },
+            limit,
+            FUZZY_SEARCH_MIN_SCORE,
+        )
+
     def browse(self, uri: str | None = None) -> Any:
         """Wrapper for the MopidyAPI.library.browse method"""
         # NOTE: when uri is None, the root will be returned
         return self.api.library.browse(uri)
 
+    def expand_directory(
+        self,
+        uri: str,
+        max_depth: int = DIRECTORY_MAX_DEPTH,
+        max_tracks: int = DIRECTORY_MAX_TRACKS,
+        max_directories: int = DIRECTORY_MAX_BROWSED,
+        batch_size: int = DIRECTORY_BROWSE_BATCH_SIZE,
+    ) -> Any:
+        """Yield the track uris below a directory, level by level
+
+        Directories are browsed in tree order, up to batch_size of them per
+        JSON-RPC batch request; each batch yields the tracks it found, so the
+        first tracks can be queued while the walk continues. The tracks of a
+        directory come before those of its sub-directories. A directory that
+        cannot be browsed is skipped; the walk stops early when the server
+        becomes unavailable.
+
+        Args:
+            uri: Directory to expand
+            max_depth: Sub-directory levels to descend into
+            max_tracks: Tracks to yield at most
+            max_directories: Directories to browse at most
+            batch_size: Directories browsed per request
+        """
+        pending = [(uri, 0)]
+        seen = {uri}
+        remaining = max_tracks
+        browsed = 0
+        while pending and remaining > 0 and browsed < max_directories:
+            count = min(batch_size, max_directories - browsed)
+            current, pending = pending[:count], pending[count:]
+            browsed += len(current)
+            try:
+                with self.api.long_running_calls():
+                    results = self.api.rpc_batch(
+                        [("core.library.browse", {"uri": x}) for x, _ in current],
+                        return_errors=True,
+                    )
+            except reConnectionError as error:
+                _LOGGER.error("Stopped expanding directory %s, Mopidy server is unavailable", uri)
+                _LOGGER.debug(str(error))
+                return
+            except MopidyError as error:
+                _LOGGER.warning(
+                    "Skipping %d directories below %s: %s", len(current), uri, str(error)
+                )
+                continue
+
+            tracks = []
+            subdirectories = []
+            for (directory, depth), refs in zip(current, results):
+                if isinstance(refs, MopidyError):
+                    _LOGGER.warning("Skipping directory %s: %s", directory, str(refs))
+                    continue
+                for ref in refs or []:
+                    if ref.type == "track":
+                        tracks.append(ref.uri)
+                    elif ref.type in ["directory", "album", "artist"] and depth < max_depth:
+                        if ref.uri not in seen:
+                            seen.add(ref.uri)
+                            subdirectories.append((ref.uri, depth + 1))
+            pending = subdirectories + pending
+
+            tracks = tracks[:remaining]
+            remaining -= len(tracks)
+            if len(tracks) > 0:
+                yield tracks
+
+        if remaining == 0:
+            _LOGGER.warning(
+                "Directory %s holds more than %d tracks, only the first ones were queued",
+                uri,
+                max_tracks
+            )
+        elif pending:
+            _LOGGER.warning(
+                "Directory %s holds more than %d directories, only the first ones were queued",
+                uri,
+                max_directories
+            )
+
     def get_images(self, uris: list[str] | None = None) -> dict[str, Any]:
         """Wrapper for the MopidyAPI.library.get_images method"""
         if uris is None:
@@ -66,8 +447,15 @@ class MopidyLibrary:
 
         return [x.uri for x in self.browse(uri)]
 
-    def search(self, sources: list[str] | None = None, query: dict[str, list[str]] | None = None, exact: bool = False) -> Any:
-        """Search the library for something"""
+    def refresh(self, uri: str | None = None) -> None:
+        """Refresh the library and invalidate cached search results and metadata"""
+        self.api.library.refresh(uri=uri)
+        self.clear_search_cache()
+        self.clear_fuzzy_index()
+        self.clear_track_cache()
+
+    def resolve_search_sources(self, sources: list[str] | None = None) -> list[str] | None:
+        """Return the source uris supported by the server, or None for all sources"""
         if sources is None:
             sources = []
 
@@ -79,22 +467,31 @@ class MopidyLibrary:
                 uris.append(el)
 
         if len(uris) == 0:
-            uris = None
+            return None
+        return uris
 
+    def search(self, sources: list[str] | None = None, query: dict[str, list[str]] | None = None, exact: bool = False) -> Any:
+        """Search the library for something"""
         res = self.api.library.search(
             query=query,
-            uris=uris,
+            uris=self.resolve_search_sources(sources),
             exact=exact,
         )
         return res
 
     def search_tracks(self, sources: list[str] | None = None, query: dict[str, list[str]] | None = None, exact: bool = False) -> list[str]:
         """Search the library for matching tracks"""
+        key = search_cache_key("search", self.resolve_search_sources(sources), query, exact)
+        cached = self.cached_search_result(key)
+        if cached is not None:
+            return cached
+
         uris = []
         for res in self.search(sources, query, exact):
             for track in getattr(res, "tracks", []):
                 uris.append(track.uri)
 
+        self.cache_search_result(key, uris)
         return uris
 
     @property
@@ -112,13 +509,89 @@ class MopidyLibrary:
 
         return self._attr_supported_uri_schemes
 
-class MopidyQueue:
+FILTER_TEXT_FIELDS = {
+    "artist": "artist",
+    "album": "album",
+    "genre": "genre",
+    "track_name": "name",
+}
+
+def compile_filter_group(criteria: dict[str, Any], columns: dict[str, list]) -> Any:
+    """Compile one AND group of filter criteria into a row predicate.
+
+    Criteria strings are case-folded (or compiled as case-insensitive regular
+    expressions) once, so matching a row only reads the precomputed columns.
+
+    Raises:
+        ValueError: If the group has no criteria or contains an invalid regex
+    """
+    use_regex = criteria.get("regex", False)
+    checks = []
+    for field, column_name in FILTER_TEXT_FIELDS.items():
+        value = criteria.get(field)
+        if not value:
+            continue
+
+        if use_regex:
+            try:
+                pattern = re.compile(value, re.IGNORECASE)
+            except re.error as error:
+                raise ValueError(f"Invalid regular expression for {field}: {error}") from error
+            test = pattern.search
+        else:
+            needle = value.casefold()
+            test = lambda text, needle=needle: needle in text
+
+        if field == "artist" and criteria.get("any_artist", False):
+            column = columns["artists"]
+            checks.append(lambda i, column=column, test=test: any(test(x) for x in column[i]))
+        else:
+            column = columns[column_name]
+            checks.append(lambda i, column=column, test=test: bool(test(column[i])))
+
+    min_duration = criteria.get("min_duration")
+    max_duration = criteria.get("max_duration")
+    if min_duration is not None or max_duration is not None:
+        durations = columns["duration"]
+        low = min_duration if min_duration is not None else 0
+        high = max_duration if max_duration is not None else float("inf")
+        checks.append(
+            lambda i: durations[i] is not None and low <= durations[i] <= high
+        )
+
+    if len(checks) == 0:
+        raise ValueError("At least one criteria field must be provided")
+
+    return lambda i: all(check(i) for check in checks)
+
+_UNSET = object()
+
+
+class StateVersion:
+    """Count changes of the values exposed in the Home Assistant state.
+
+    Every assignment of a different value to an ``_attr_*`` or ``_current_*``
+    attribute increments state_version.
+    """
+
+    state_version: int = 0
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name.startswith(("_attr_", "_current_")) and getattr(self, name, _UNSET) != value:
+            object.__setattr__(self, "state_version", self.state_version + 1)
+        object.__setattr__(self, name, value)
+
+
+class MopidyQueue(StateVersion):
     """Representation of Mopidy Queue"""
 
     hass: HomeAssistant | None = None
-    api: MopidyAPI | None = None
+    api: MopidyClient | None = None
+    library: MopidyLibrary | None = None
     queue: dict | None = None
     local_url_base: str | None = None
+    hostname: str | None = None
+    port: int | None = None
 
     _current_track_tlid: int | None = None
     _current_track_album_artist: str | None = None
@@ -130,6 +603,10 @@ class MopidyQueue:
     _current_track_image_remotely_accessible: bool | None = None
     _current_track_playlist_name: str | None = None
     _current_track_position: int | None = None
+    attribute_window: int = DEFAULT_QUEUE_ATTRIBUTE_WINDOW
+    image_prefetch_count: int = IMAGE_PREFETCH_TRACKS
+    _position_checked_at: float = 0.0
+    _position_stale: bool = True
     _current_track_position_updated_at: datetime.datetime | None = None
     _current_track_title: str | None = None
     _current_track_is_stream: bool | None = None
@@ -142,8 +619,27 @@ class MopidyQueue:
     def __init__(self):
         """Initialize queue"""
         self.queue = {}
+        # Websocket handlers on the event loop and refreshes in the executor both update the queue
+        self._queue_lock = threading.RLock()
+        self.columns = self.__empty_columns()
+        self._image_cache: OrderedDict[str, list[Any]] = OrderedDict()
+        self._image_cache_lock = threading.Lock()
         self.clear_current_track()
 
+    @staticmethod
+    def __empty_columns() -> dict[str, list]:
+        """Return empty columnar storage for the queue mirror"""
+        return {
+            "tlid": [],
+            "uri": [],
+            "artist": [],
+            "artists": [],
+            "album": [],
+            "genre": [],
+            "name": [],
+            "duration": [],
+        }
+
     def __get_current_track_position(self):
         """Get the position of the current track"""
         try:
@@ -155,6 +651,7 @@ class MopidyQueue:
                 self.port
             )
             _LOGGER.debug("Connection error details: %s", str(error))
+            return
 
         self.set_current_track_position(int(current_media_position / 1000))
 
@@ -171,34 +668,92 @@ class MopidyQueue:
             _LOGGER.debug("Connection error details: %s", str(error))
             return
 
-        if self._current_track_tlid is not None and self.queue[self._current_track_tlid] is not None:
+        if self._current_track_tlid is not None and self.queue.get(self._current_track_tlid) is not None:
             if current_stream_title is not None:
                 self.set_stream_title(current_stream_title)
             else:
                 self._current_track_is_stream = False
 
-    def __get_track_image(self, uri=None):
-        if uri is None:
+    def __cache_images(self, images):
+        """Store the image lists of track uris in the bounded image cache"""
+        with self._image_cache_lock:
+            for uri, uri_images in images.items():
+                _bounded_cache_set(
+                    self._image_cache, uri, uri_images or [], max_size=IMAGE_CACHE_MAX_SIZE
+                )
+
+    def __cached_images(self, uri):
+        """Return the cached image list of a track uri, if known"""
+        with self._image_cache_lock:
+            images = self._image_cache.get(uri)
+            if images is not None:
+                self._image_cache.move_to_end(uri)
+        return images
+
+    def clear_image_cache(self):
+        """Drop all cached track images"""
+        with self._image_cache_lock:
+            self._image_cache.clear()
+
+    def prefetch_images(self):
+        """Fetch the images of the upcoming queue tracks in one request
+
+        The current track and the image_prefetch_count tracks after it are
+        looked up, skipping those already cached, so a track change finds
+        its image without a request.
+        """
+        tlids = self.columns["tlid"]
+        try:
+            start = tlids.index(self._current_track_tlid)
+        except ValueError:
+            if self._attr_queue_position is None:
+                return
+            start = self._attr_queue_position - 1
+
+        uris = []
+        for tlid in tlids[max(start, 0):start + 1 + self.image_prefetch_count]:
+            uri = self.queue.get(tlid, {}).get("uri")
+            if uri is not None and uri not in uris and self.__cached_images(uri) is None:
+                uris.append(uri)
+        if len(uris) == 0:
             return
 
         try:
-            current_image = self.api.library.get_images([uri])
+            images = self.api.library.get_images(uris)
         except reConnectionError as error:
-            _LOGGER.error(
-                "Cannot get image for media from Mopidy server at %s:%d",
+            _LOGGER.debug(
+                "Cannot prefetch images from Mopidy server at %s:%d: %s",
                 self.hostname,
-                self.port
+                self.port,
+                str(error)
             )
-            _LOGGER.debug("Connection error details: %s", str(error))
+            return
 
-        if (
-            current_image is not None
-            and uri in current_image
-            and len(current_image[uri]) > 0
-            and hasattr(current_image[uri][0], "uri")
-        ):
+        self.__cache_images({uri: (images or {}).get(uri) for uri in uris})
+
+    def __get_track_image(self, uri=None):
+        if uri is None:
+            return
+
+        images = self.__cached_images(uri)
+        if images is None:
+            try:
+                current_image = self.api.library.get_images([uri])
+            except reConnectionError as error:
+                _LOGGER.error(
+                    "Cannot get image for media from Mopidy server at %s:%d",
+                    self.hostname,
+                    self.port
+                )
+                _LOGGER.debug("Connection error details: %s", str(error))
+                return
+
+            images = (current_image or {}).get(uri) or []
+            self.__cache_images({uri: images})
+
+        if len(images) > 0 and hasattr(images[0], "uri"):
             image_url = self.expand_url(
-                self.current_track_extension, current_image[uri][0].uri
+                self.current_track_extension, images[0].uri
             )
         elif (self._current_track_is_stream):
             image_url = None
@@ -214,12 +769,13 @@ class MopidyQueue:
             _LOGGER.error("__set_track_info: tlid is invalid: %s", str(tlid))
             return None
 
-        if tlid not in self.queue:
-            self.queue[tlid] = { "tlid": tlid }
+        with self._queue_lock:
+            if tlid not in self.queue:
+                self.queue[tlid] = { "tlid": tlid }
 
-        self.queue[tlid].update(track_info)
+            self.queue[tlid].update(track_info)
 
-        return self.queue[tlid]
+            return self.queue[tlid]
 
     def clear_current_track(self) -> None:
         """Clear current track information."""
@@ -259,41 +815,45 @@ class MopidyQueue:
     def parse_track_info(self, track: Any, tlid: int | None = None, current: bool = False) -> dict[str, Any]:
         """Parse the track info"""
         track_info = { "tlid": tlid }
-        if hasattr(track, "uri"):
-            track_info["uri"] = track.uri
-            track_info["source"] = track.uri.partition(":")[0]
+        metadata = self.library.track_metadata(track)
+        if metadata["uri"] is not None:
+            track_info["uri"] = metadata["uri"]
+            track_info["source"] = metadata["uri"].partition(":")[0]
 
-        if hasattr(track, "track_no"):
-            track_info["number"] = int(track.track_no)
+        if metadata["track_no"] is not None:
+            track_info["number"] = int(metadata["track_no"])
 
-        if hasattr(track, "length"):
-            track_info["duration"] = int(track.length / 1000)
+        if metadata["duration"] is not None:
+            track_info["duration"] = metadata["duration"]
 
-        if hasattr(track, "album") and hasattr(track.album, "name"):
-            track_info["album_name"] = track.album.name
+        if metadata["album_name"] is not None:
+            track_info["album_name"] = metadata["album_name"]
 
         if hasattr(track, "artists"):
-            track_info["album_artist"] = ", ".join([x.name for x in track.artists])
+            track_info["album_artist"] = metadata["artist"]
 
-        if hasattr(track, "name"):
-            track_info["title"] = track.name
+        if metadata["name"] is not None:
+            track_info["title"] = metadata["name"]
 
         if hasattr(track, "artists"):
-            track_info["artist"] = ", ".join([x.name for x in track.artists])
+            track_info["artist"] = metadata["artist"]
 
-        self.__set_track_info(tlid, track_info)
-        if current:
+        with self._queue_lock:
+            queued = self.__set_track_info(tlid, track_info)
+            if current and queued is not None:
+                queued = dict(queued)
+        if current and queued is not None:
             self._current_track_tlid = tlid
-            self._current_track_uri = self.queue[tlid].get("uri")
-            self._current_track_album_artist = self.queue[tlid].get("album_artist")
-            self._current_track_album_name = self.queue[tlid].get("album_name")
-            self._current_track_artist = self.queue[tlid].get("artist")
-            self._current_track_duration = self.queue[tlid].get("duration")
-            self._current_track_extension = self.queue[tlid].get("source")
-            self._current_track_playlist_name = self.queue[tlid].get("playlist_name")
-            self._current_track_title = self.queue[tlid].get("title")
-            self._current_track_is_stream = self.queue[tlid].get("is_stream")
-            self._current_track_number = self.queue[tlid].get("number")
+            self._current_track_uri = queued.get("uri")
+            self._current_track_album_artist = queued.get("album_artist")
+            self._current_track_album_name = queued.get("album_name")
+            self._current_track_artist = queued.get("artist")
+            self._current_track_duration = queued.get("duration")
+            self._current_track_extension = queued.get("source")
+            self._current_track_playlist_name = queued.get("playlist_name")
+            self._current_track_title = queued.get("title")
+            self._current_track_is_stream = queued.get("is_stream")
+            self._current_track_number = queued.get("number")
 
         return track_info
 
@@ -301,6 +861,12 @@ class MopidyQueue:
         """Set the media position"""
         self._current_track_position = value
         self._current_track_position_updated_at = dt_util.utcnow()
+        self._position_stale = False
+        self._position_checked_at = time.monotonic()
+
+    def request_position_refresh(self):
+        """Query the media position on the next current track update"""
+        self._position_stale = True
 
     def set_local_url_base(self, value):
         """Assign a url base"""
@@ -337,6 +903,11 @@ class MopidyQueue:
             return
 
         if hasattr(current_track, "track") and hasattr(current_track, "tlid"):
+            previous_tlid = self._current_track_tlid
+            if previous_tlid != current_track.tlid:
+                # The position of the previous track no longer applies
+                self._current_track_position = None
+                self._current_track_position_updated_at = dt_util.utcnow()
             track_info = self.parse_track_info(
                 track=current_track.track,
                 tlid=current_track.tlid,
@@ -344,8 +915,16 @@ class MopidyQueue:
                 )
             self.update_current_image_url()
 
-            self.__get_current_track_position()
+            # Home Assistant extrapolates the position while playing, only
+            # query it when it may have drifted
+            if (
+                self._position_stale
+                or self._current_track_position is None
+                or time.monotonic() - self._position_checked_at > POSITION_DRIFT_CHECK_SECONDS
+            ):
+                self.__get_current_track_position()
             self.__get_current_track_stream_info()
+            self.prefetch_images()
 
         if updater is not None:
             updater()
@@ -373,24 +952,55 @@ class MopidyQueue:
             )
             _LOGGER.debug(str(error))
 
-        tlid_queue = [ x.tlid for x in res ]
-        purge_queue = []
-        for tlid in self.queue:
-            if tlid not in tlid_queue:
-                purge_queue.append(tlid)
-
-        index = 0
+        # Columnar, case-folded mirror of the queue used for filtering
+        columns = self.__empty_columns()
         for el in res:
-            self.__set_track_info(
-                el.tlid,
-                {
-                    "uri": el.track.uri,
-                    "index": index,
-                })
-            index = index +1
+            metadata = self.library.track_metadata(el.track)
+            artists = tuple(x["name"].casefold() for x in metadata["artists"] if "name" in x)
+            columns["tlid"].append(el.tlid)
+            columns["uri"].append(el.track.uri)
+            columns["artist"].append(artists[0] if artists else "")
+            columns["artists"].append(artists)
+            columns["album"].append((metadata["album_name"] or "").casefold())
+            columns["genre"].append((metadata["genre"] or "").casefold())
+            columns["name"].append((metadata["name"] or "").casefold())
+            columns["duration"].append(metadata["duration"])
+
+        tlid_queue = { x.tlid for x in res }
+        with self._queue_lock:
+            for index, el in enumerate(res):
+                self.__set_track_info(
+                    el.tlid,
+                    {
+                        "uri": el.track.uri,
+                        "index": index,
+                    })
+            for tlid in [x for x in self.queue if x not in tlid_queue]:
+                del self.queue[tlid]
+            self.columns = columns
+
+    def match_positions(self, criteria: dict[str, Any] | list[dict[str, Any]]) -> list[tuple[int, int]]:
+        """Return (position, tlid) pairs of queued tracks matching the criteria.
 
-        for tlid in purge_queue:
-            del self.queue[tlid]
+        Args:
+            criteria: A criteria group, or a list of groups of which any may match.
+                Within a group all criteria must match.
+
+        Returns:
+            List of 1-based positions and their tlids, in queue order
+        """
+        columns = self.columns
+        groups = criteria if isinstance(criteria, list) else [criteria]
+        if len(groups) == 0:
+            raise ValueError("At least one criteria field must be provided")
+        predicates = [compile_filter_group(group, columns) for group in groups]
+
+        tlids = columns["tlid"]
+        return [
+            (i + 1, tlids[i])
+            for i in range(len(tlids))
+            if any(predicate(i) for predicate in predicates)
+        ]
 
     def update_queued_tracks(self, media_id, media_type, **kwargs):
         """Update the queue with new information"""
@@ -450,6 +1060,8 @@ class MopidyQueue:
             )
             self._attr_queue_tracks = []
 
+        self.prefetch_images()
+
         if updater is not None:
             updater()
 
@@ -525,8 +1137,8 @@ class MopidyQueue:
 
     @property
     def uri_list(self):
-        """Return a list of uris of the current queue"""
-        return [ self.queue[x]["uri"] for x in self.queue ]
+        """Return the uris of the current queue in tracklist order, repeated tracks included"""
+        return list(self.columns["uri"])
 
     @property
     def size(self):
@@ -558,35 +1170,31 @@ class MopidyQueue:
         if not tl_tracks:
             return []
         
+        # Only expose a window of a long queue, starting a little before the current track
+        start = 0
+        if 0 < self.attribute_window < len(tl_tracks):
+            current_index = (self._attr_queue_position or 1) - 1
+            start = max(0, min(current_index - self.attribute_window // 4, len(tl_tracks) - self.attribute_window))
+            tl_tracks = tl_tracks[start:start + self.attribute_window]
+
         tracks = []
-        for idx, tl_track in enumerate(tl_tracks):
+        for idx, tl_track in enumerate(tl_tracks, start):
             position = idx + 1  # Convert 0-based index to 1-based position
             tlid = tl_track.tlid if hasattr(tl_track, 'tlid') else None
             
             # Get track info from queue dictionary if available
             track_info = self.queue.get(tlid, {}) if tlid and self.queue else {}
             
-            # Get track object from tl_track
+            # Get normalized metadata for the track object from the track cache
             track = tl_track.track if hasattr(tl_track, 'track') else None
+            metadata = self.library.track_metadata(track) if track is not None else {}
             
-            # Extract metadata, preferring queue info, then track object
-            uri = track_info.get("uri") or (track.uri if track and hasattr(track, 'uri') else "")
-            title = track_info.get("title") or (track.name if track and hasattr(track, 'name') else None)
-            artist = track_info.get("artist") or (
-                ", ".join([a.name for a in track.artists]) 
-                if track and hasattr(track, 'artists') and track.artists 
-                else None
-            )
-            album = track_info.get("album_name") or (
-                track.album.name 
-                if track and hasattr(track, 'album') and hasattr(track.album, 'name') 
-                else None
-            )
-            duration = track_info.get("duration") or (
-                int(track.length / 1000) 
-                if track and hasattr(track, 'length') 
-                else None
-            )
+            # Extract metadata, preferring queue info, then track metadata
+            uri = track_info.get("uri") or metadata.get("uri") or ""
+            title = track_info.get("title") or metadata.get("name")
+            artist = track_info.get("artist") or metadata.get("artist")
+            album = track_info.get("album_name") or metadata.get("album_name")
+            duration = track_info.get("duration") or metadata.get("duration")
             
             track_dict = {
                 "position": position,
@@ -600,14 +1208,13 @@ class MopidyQueue:
         
         return tracks
 
-class MopidySpeaker:
+class MopidySpeaker(StateVersion):
     """Representation of Mopidy Speaker"""
 
     hass: HomeAssistant | None = None
     hostname: str | None = None
     port: int | None = None
-    api: MopidyAPI | None = None
-    snapshot: dict | None = None
+    api: MopidyClient | None = None
     queue: MopidyQueue | None = None
 
     _attr_is_available: bool | None = None
@@ -620,7 +1227,6 @@ class MopidySpeaker:
     _attr_state: MediaPlayerState | None = None
     _attr_repeat: RepeatMode | str | None = None
     _attr_shuffle: bool | None = None
-    _attr_snapshot_at: datetime.datetime | None = None
 
     _attr_supported_features = (
         MediaPlayerEntityFeature.BROWSE_MEDIA
@@ -656,21 +1262,88 @@ class MopidySpeaker:
 
         self._attr_is_available = False
         self.queue = MopidyQueue()
+        self.queue.hostname = hostname
+        self.queue.port = self.port
         self.queue.set_local_url_base(f"http://{hostname}:{port}")
         self.library = MopidyLibrary()
-
+        self.library.hass = hass
+        self.queue.library = self.library
+        storage_id = re.sub(r"[._-]+", "_", hostname) + "_" + str(self.port)
+        self.history = MopidyHistory(hass, storage_id, HISTORY_MAX_SIZE)
+        self.play_stats = MopidyPlayStats(hass, storage_id)
+        self.snapshots = MopidySnapshots(hass, storage_id)
+
+        self.rpc_timeout = (RPC_CONNECT_TIMEOUT_SECONDS, RPC_TIMEOUT_SECONDS)
+        self.rpc_long_timeout = RPC_LONG_TIMEOUT_SECONDS
+        self.update_deadline = UPDATE_DEADLINE_SECONDS
+        self.restore_timeout = RESTORE_TIMEOUT_SECONDS
+        self.volume_step = VOLUME_STEP_PERCENT
+        self.update_mode = UPDATE_MODE_PUSH
+
+        self.breaker = CircuitBreaker(f"{self.hostname}:{self.port}")
         self.__connect()
         self.entity = None
         self.queue.api = self.api
         self.library.api = self.api
-        self._attr_snapshot_at = None
+        self._playback_waiters: set[asyncio.Future] = set()
+        self._restore_task: asyncio.Task | None = None
+        self._restore_abort = False
+        self._ws_unregister = None
+        self._ws_connected: bool | None = None
+        self._setup_done = False
+        self._source_list_stale = True
+        self._playlists: dict[str, str] = {}
+        self._playlist_index: dict[str, str] = {}
+        self._playlist_hashes: dict[str, str] = {}
+        self._dirty: set[str] = set()
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._flush_task: asyncio.Task | None = None
+        self.events = MopidyEventQueue(hass, self.__ws_apply_event, self.__ws_events_dropped)
+
+    async def async_setup(self) -> None:
+        """Listen to server events, load persisted state and seed an empty local history"""
+        self._setup_done = True
+        if self.update_mode == UPDATE_MODE_PUSH:
+            self.__async_start_events()
+
+        await self.snapshots.async_load()
+        await self.play_stats.async_load()
+        await self.history.async_load()
+        if len(self.history) > 0:
+            return
+
+        try:
+            # core.history.get_history takes no arguments, most recent first
+            history_tracks = await self.hass.async_add_executor_job(self.api.history.get_history)
+        except (reConnectionError, MopidyError) as error:
+            _LOGGER.debug(
+                "Could not seed playback history from Mopidy server at %s:%d: %s",
+                self.hostname,
+                self.port,
+                str(error)
+            )
+            return
+
+        self.history.seed(
+            [self._format_history_entry(x) for x in (history_tracks or [])[:HISTORY_MAX_SIZE]]
+        )
+
+    def __invalidate_session_cache(self):
+        """Fetch the URI schemes and playlists again on the next update"""
+        self._attr_supported_uri_schemes = None
+        self.library._attr_supported_uri_schemes = None
+        self.queue.clear_image_cache()
+        self._source_list_stale = True
+        self._playlist_hashes = {}
 
     def __clear(self):
         """Reset all Values"""
+        self.__invalidate_session_cache()
         self._attr_software_version = None
-        self._attr_supported_uri_schemes = None
         self._attr_consume_mode = None
         self._attr_source_list = None
+        self._playlists = {}
+        self._playlist_index = {}
         self._attr_volume_level = None
         self._attr_is_volume_muted = None
         self._attr_state = None
@@ -680,27 +1353,34 @@ class MopidySpeaker:
 
     def __connect(self):
         """(Re)Connect to the Mopidy Server"""
-        self.api = MopidyAPI(
+        self.api = MopidyClient(
             host = self.hostname,
             port = self.port,
-            use_websocket = True,
+            use_websocket = False,
             logger = logging.getLogger(__name__ + ".api"),
+            breaker = self.breaker,
+            timeout = self.rpc_timeout,
+            long_timeout = self.rpc_long_timeout,
         )
 
         # NOTE: the callbacks can be found at
         #     https://docs.mopidy.com/en/latest/api/core/#mopidy.core.CoreListener
-        # not using playlist_changed, playlist_deleted, playlists_loaded, track_playback_ended
-        # as they are updated on update
-        self.api.add_callback('options_changed', self.__ws_options_changed)
-        self.api.add_callback('mute_changed', self.__ws_mute_changed)
-        self.api.add_callback('playback_state_changed', self.__ws_playback_state_changed)
-        self.api.add_callback('seeked', self.__ws_seeked)
-        self.api.add_callback('stream_title_changed', self.__ws_stream_title_changed)
-        self.api.add_callback('track_playback_paused', self.__ws_track_playback_paused)
-        self.api.add_callback('track_playback_resumed', self.__ws_track_playback_resumed)
-        self.api.add_callback('track_playback_started', self.__ws_track_playback_started)
-        self.api.add_callback('tracklist_changed', self.__ws_tracklist_changed)
-        self.api.add_callback('volume_changed', self.__ws_volume_changed)
+        # not using track_playback_ended as it is updated on update
+        self._ws_handlers = {
+            'options_changed': self.__ws_options_changed,
+            'mute_changed': self.__ws_mute_changed,
+            'playback_state_changed': self.__ws_playback_state_changed,
+            'playlist_changed': self.__ws_playlist_changed,
+            'playlist_deleted': self.__ws_playlist_deleted,
+            'playlists_loaded': self.__ws_playlists_loaded,
+            'seeked': self.__ws_seeked,
+            'stream_title_changed': self.__ws_stream_title_changed,
+            'track_playback_paused': self.__ws_track_playback_paused,
+            'track_playback_resumed': self.__ws_track_playback_resumed,
+            'track_playback_started': self.__ws_track_playback_started,
+            'tracklist_changed': self.__ws_tracklist_changed,
+            'volume_changed': self.__ws_volume_changed,
+        }
 
     def __eval_state(self, PlaybackState):
         """Return the Mopidy PlaybackState as a valid media_player state"""
@@ -747,79 +1427,32 @@ class MopidySpeaker:
         """Format Mopidy history entry with required fields.
         
         Args:
-            history_track: Mopidy history track object (has track and timestamp attributes)
+            history_track: Mopidy history entry (a [timestamp in ms, ref] pair),
+                an object with track and timestamp attributes, or a track
             
         Returns:
             Dictionary with URI, artist, album, track_name, and timestamp fields
         """
-        track = history_track.track if hasattr(history_track, 'track') else history_track
-        timestamp = history_track.timestamp if hasattr(history_track, 'timestamp') else None
+        if isinstance(history_track, list) and len(history_track) == 2:
+            # Server history only holds refs; keep them out of the track cache
+            milliseconds, track = history_track
+            timestamp = dt_util.utc_from_timestamp(milliseconds / 1000) if milliseconds else None
+            metadata = normalize_track(track)
+        else:
+            track = history_track.track if hasattr(history_track, 'track') else history_track
+            timestamp = history_track.timestamp if hasattr(history_track, 'timestamp') else None
+            metadata = self.library.track_metadata(track)
         
         entry: dict[str, Any] = {
-            'uri': track.uri if hasattr(track, 'uri') else None,
-            'artist': None,
-            'album': None,
-            'track_name': track.name if hasattr(track, 'name') else None,
+            'uri': metadata['uri'],
+            'artist': metadata['first_artist'],
+            'album': metadata['album_name'],
+            'track_name': metadata['name'],
             'timestamp': timestamp.isoformat() if timestamp else dt_util.utcnow().isoformat(),
         }
         
-        # Extract artist
-        if hasattr(track, 'artists') and track.artists and len(track.artists) > 0:
-            entry['artist'] = track.artists[0].name if hasattr(track.artists[0], 'name') else None
-        
-        # Extract album
-        if hasattr(track, 'album') and track.album:
-            entry['album'] = track.album.name if hasattr(track.album, 'name') else None
-        
         return entry
 
-    def _match_filter_criteria(self, track: Any, criteria: dict[str, str]) -> bool:
-        """Check if a track matches filter criteria (case-insensitive, AND logic).
-        
-        Args:
-            track: Track object to check
-            criteria: Dictionary with optional artist, album, genre, track_name fields
-            
-        Returns:
-            True if track matches ALL specified criteria, False otherwise
-        """
-        # Extract track metadata
-        track_artist = None
-        track_album = None
-        track_genre = None
-        track_name = None
-        
-        if hasattr(track, 'artists') and track.artists and len(track.artists) > 0:
-            track_artist = track.artists[0].name if hasattr(track.artists[0], 'name') else None
-        
-        if hasattr(track, 'album') and track.album:
-            track_album = track.album.name if hasattr(track.album, 'name') else None
-        
-        if hasattr(track, 'genre'):
-            track_genre = track.genre
-        
-        if hasattr(track, 'name'):
-            track_name = track.name
-        
-        # Check each criterion (AND logic - all must match)
-        if 'artist' in criteria and criteria['artist']:
-            if not track_artist or criteria['artist'].lower() not in track_artist.lower():
-                return False
-        
-        if 'album' in criteria and criteria['album']:
-            if not track_album or criteria['album'].lower() not in track_album.lower():
-                return False
-        
-        if 'genre' in criteria and criteria['genre']:
-            if not track_genre or criteria['genre'].lower() not in track_genre.lower():
-                return False
-        
-        if 'track_name' in criteria and criteria['track_name']:
-            if not track_name or criteria['track_name'].lower() not in track_name.lower():
-                return False
-        
-        return True
-
     def __get_consume_mode(self):
         """Get the Mopidy Instance consume mode"""
         try:
@@ -892,16 +1525,21 @@ class MopidySpeaker:
             self._attr_software_version = self.api.rpc_call("core.get_version")
             self._attr_is_available = True
         except reConnectionError as error:
+            # The circuit breaker logs the outage once, only log the first failure
+            if self._attr_is_available is not False:
+                _LOGGER.error(
+                    "An error occurred connecting to Mopidy server at %s:%d",
+                    self.hostname,
+                    self.port
+                )
             self._attr_is_available = False
-            _LOGGER.error(
-                "An error occurred connecting to Mopidy server at %s:%d",
-                self.hostname,
-                self.port
-            )
             _LOGGER.debug(str(error))
 
     def __get_supported_uri_schemes(self):
         """Get the Mopidy Instance supported extensions/schemes"""
+        if self._attr_supported_uri_schemes is not None:
+            # Only change with a server restart, which invalidates the cache
+            return
         try:
             self._attr_supported_uri_schemes = self.api.rpc_call("core.get_uri_schemes")
         except reConnectionError as error:
@@ -915,12 +1553,112 @@ class MopidySpeaker:
 
     def __get_source_list(self):
         """Get the Mopidy Instance sources available"""
-        self._attr_source_list = [x.name for x in self.library.playlists]
+        self.__set_playlists({x.uri: x.name for x in self.library.playlists})
+        self._source_list_stale = False
+
+    def __set_playlists(self, playlists):
+        """Set the known playlists (URI to name) and derive the sources from them"""
+        self._playlists = playlists
+        index = {}
+        for uri, name in playlists.items():
+            # The first playlist wins when names collide, as in the playlist order
+            index.setdefault(name, uri)
+        self._playlist_index = index
+        self._attr_source_list = list(playlists.values())
+
+    def __store_playlist(self, uri, name):
+        """Add or rename a playlist in the known playlists"""
+        if self._playlists.get(uri) != name:
+            self.__set_playlists({**self._playlists, uri: name})
+
+    def __forget_playlist(self, uri):
+        """Remove a playlist from the known playlists"""
+        self._playlist_hashes.pop(uri, None)
+        if uri in self._playlists:
+            self.__set_playlists({k: v for k, v in self._playlists.items() if k != uri})
+
+    def __playlist_unchanged(self, uri, uris, tracks=None):
+        """Return whether the playlist at uri already holds exactly uris
+
+        The content hash of a playlist is cached from its last save and from
+        playlist_changed events; without a websocket those may have been
+        missed, so the stored items are fetched to compare against instead.
+
+        Args:
+            uri: Playlist URI
+            uris: Track URIs about to be saved
+            tracks: Tracks of the playlist, when just looked up
+        """
+        known = None
+        if tracks is not None:
+            known = playlist_content_hash([x.uri for x in tracks])
+        elif self.websocket_connected:
+            known = self._playlist_hashes.get(uri)
+        if known is None:
+            items = self.api.playlists.get_items(uri=uri)
+            if items is None:
+                return False
+            known = playlist_content_hash([x.uri for x in items])
+        self._playlist_hashes[uri] = known
+        return known == playlist_content_hash(uris)
+
+    def __save_playlist_tracks(self, uri, name, uris, tracks=None):
+        """Save uris as the tracks of playlist uri, unless it already holds them
+
+        Args:
+            uri: Playlist URI
+            name: Playlist name
+            uris: Track URIs to save
+            tracks: Tracks of the playlist, when just looked up
+
+        Returns:
+            Whether the playlist was written
+        """
+        if self.__playlist_unchanged(uri, uris, tracks):
+            _LOGGER.debug("Playlist '%s' is unchanged, not saving it", name)
+            return False
+
+        # Mopidy only saves whole playlists; send the bare minimum per track
+        saved = self.api.playlists.save(playlist={
+            'uri': uri,
+            'name': name,
+            'tracks': [{'uri': x} for x in uris]
+        })
+        if saved is None:
+            # The backend did not save it, so its contents are unknown
+            self._playlist_hashes.pop(uri, None)
+            _LOGGER.error(
+                "Playlist '%s' was not saved by Mopidy server at %s:%d",
+                name,
+                self.hostname,
+                self.port
+            )
+            return False
+
+        self._playlist_hashes[uri] = playlist_content_hash(
+            [x.uri for x in getattr(saved, 'tracks', None) or []]
+        )
+        return True
+
+    def find_playlist_uri(self, name):
+        """Return the URI of the playlist called name, or None
+
+        The name index is kept current by the playlist events; the playlists
+        are only fetched again when the index may be out of date.
+        """
+        if self._source_list_stale or not self.websocket_connected:
+            self.__get_source_list()
+        return self._playlist_index.get(name)
+
+    def __get_stale_source_list(self):
+        """Get the sources, unless playlist events keep the cached list current"""
+        if self._source_list_stale or not self.websocket_connected:
+            self.__get_source_list()
 
     def __get_state(self):
         """Get the Mopidy Instance state"""
         try:
-            self._attr_state = self.__eval_state(
+            state = self.__eval_state(
                 self.api.playback.get_state()
             )
         except reConnectionError as error:
@@ -931,6 +1669,12 @@ class MopidySpeaker:
                 self.port
             )
             _LOGGER.debug(str(error))
+            return
+
+        if state != self._attr_state:
+            # Missed events may have moved the position, query it again
+            self.queue.request_position_refresh()
+        self._attr_state = state
 
     def __get_volume(self):
         """Get the Mopidy Instance volume information"""
@@ -1056,40 +1800,47 @@ class MopidySpeaker:
             _LOGGER.debug("Connection error details: %s", str(error))
             raise
 
-    def filter_tracks(self, criteria: dict[str, str]) -> None:
+    def filter_tracks(self, criteria: dict[str, Any] | list[dict[str, Any]], dry_run: bool = False) -> list[int]:
         """Remove tracks from the queue matching specified criteria.
         
         Args:
-            criteria: Dictionary with optional artist, album, genre, track_name fields.
-                     At least one field must be provided.
+            criteria: Dictionary with optional artist, album, genre, track_name,
+                     min_duration and max_duration fields, plus the regex and
+                     any_artist flags. At least one field must be provided.
                      Matching is case-insensitive, AND logic (all criteria must match).
+                     A list of such dictionaries matches tracks matching any of them.
+            dry_run: Only report the matching positions, do not remove tracks
+            
+        Returns:
+            List of 1-based positions of the matching tracks
             
         Raises:
-            ValueError: If criteria is empty or queue is empty
+            ValueError: If criteria is empty or invalid, or queue is empty
             reConnectionError: If Mopidy server is unavailable
         """
-        # Validate criteria has at least one field
-        if not criteria or not any(criteria.values()):
-            raise ValueError("At least one criteria field must be provided")
-        
         try:
             queue_length = self.queue.size
             if queue_length is None or queue_length == 0:
                 raise ValueError("Queue is empty")
             
-            # Get current tracks
-            current_tracks = self.api.tracklist.get_tl_tracks()
+            # Refresh the queue mirror unless queue events keep it current
+            if (
+                not self.websocket_connected
+                or DIRTY_QUEUE in self._dirty
+                or queue_length != len(self.queue.columns["tlid"])
+            ):
+                self.queue.update_tracks()
             
-            # Find matching tracks
-            tlids_to_remove: list[int] = []
-            for tl_track in current_tracks:
-                if self._match_filter_criteria(tl_track.track, criteria):
-                    tlids_to_remove.append(tl_track.tlid)
+            # Find matching tracks in a single pass over the mirrored columns
+            matches = self.queue.match_positions(criteria)
+            tlids_to_remove = [tlid for _, tlid in matches]
             
             # Remove matching tracks
-            if tlids_to_remove:
+            if tlids_to_remove and not dry_run:
                 self.api.tracklist.remove(criteria={"tlid": tlids_to_remove})
                 self.queue.update_tracks()
+            
+            return [position for position, _ in matches]
         except reConnectionError as error:
             self._attr_is_available = False
             _LOGGER.error(
@@ -1103,33 +1854,32 @@ class MopidySpeaker:
     def get_history(self, limit: int = 20) -> list[dict[str, Any]]:
         """Get recently played tracks with metadata.
         
+        History is recorded locally from track playback events and persisted in
+        Home Assistant storage, so reading it does not query the Mopidy server.
+        
         Args:
             limit: Maximum number of tracks to return (default 20)
             
         Returns:
             List of history entries, each with URI, artist, album, track_name, timestamp
-            
-        Raises:
-            reConnectionError: If Mopidy server is unavailable
         """
-        try:
-            history_tracks = self.api.history.get_history(limit=limit)
-            formatted_history: list[dict[str, Any]] = []
+        return self.history.entries(limit)
+
+    def get_play_stats(self, group_by: str = "track", period: str = "week", limit: int = 10) -> list[dict[str, Any]]:
+        """Get the most played tracks, artists or albums.
+        
+        Args:
+            group_by: One of track, artist or album
+            period: One of day, week, month or all
+            limit: Maximum number of entries to return
             
-            for history_track in history_tracks:
-                formatted_entry = self._format_history_entry(history_track)
-                formatted_history.append(formatted_entry)
+        Returns:
+            List of entries with their play count, most played first
             
-            return formatted_history
-        except reConnectionError as error:
-            self._attr_is_available = False
-            _LOGGER.error(
-                "An error occurred getting playback history from Mopidy server at %s:%d",
-                self.hostname,
-                self.port
-            )
-            _LOGGER.debug("Connection error details: %s", str(error))
-            raise
+        Raises:
+            ValueError: If group_by or period is unknown
+        """
+        return self.play_stats.top(group_by=group_by, period=period, limit=limit)
 
     def play_from_history(self, index: int) -> None:
         """Play a track from playback history by index.
@@ -1141,19 +1891,17 @@ class MopidySpeaker:
             ValueError: If index is out of range or no history available
             reConnectionError: If Mopidy server is unavailable
         """
+        history_tracks = self.history.entries(index + 1)
+        if index >= len(history_tracks):
+            raise ValueError(
+                f"History index {index} is out of range. History has {len(self.history)} entries."
+            )
+        
+        track_uri = history_tracks[index].get('uri')
+        if not track_uri:
+            raise ValueError("Track URI not found in history entry")
+        
         try:
-            history_tracks = self.api.history.get_history()
-            if not history_tracks or index >= len(history_tracks):
-                raise ValueError(
-                    f"History index {index} is out of range. History has {len(history_tracks) if history_tracks else 0} entries."
-                )
-            
-            history_entry = history_tracks[index]
-            track_uri = history_entry.track.uri if hasattr(history_entry, 'track') and hasattr(history_entry.track, 'uri') else history_entry.uri
-            
-            if not track_uri:
-                raise ValueError("Track URI not found in history entry")
-            
             # Play the track by adding to queue and playing
             self.queue_tracks([track_uri])
             self.media_play()
@@ -1236,8 +1984,14 @@ class MopidySpeaker:
         if media_type == MediaClass.PLAYLIST:
             media_uris = self.library.get_playlist_track_uris(media_id)
 
+        directory_tracks = iter(())
         if media_type == MediaClass.DIRECTORY:
-            media_uris = [ x.uri for x in self.library.browse(media_id)]
+            # Queue and play the first tracks found, then add the rest of the walk
+            directory_tracks = self.library.expand_directory(media_id)
+            media_uris = next(directory_tracks, [])
+            if len(media_uris) == 0:
+                _LOGGER.error("No media for %s (%s) could be found.", media_id, media_type)
+                raise MissingMediaInformation
 
         if enqueue == MediaPlayerEnqueue.ADD:
             # Add media uris to end of the queue
@@ -1274,57 +2028,208 @@ class MopidySpeaker:
             _LOGGER.error("No media for %s (%s) could be found.", media_id, media_type)
             raise MissingMediaInformation
 
+        for uris in directory_tracks:
+            at_position = None
+            if enqueue in [MediaPlayerEnqueue.NEXT, MediaPlayerEnqueue.PLAY] and index is not None:
+                at_position = index + (1 if enqueue == MediaPlayerEnqueue.NEXT else 0) + len(queued)
+            # The queue mirror is refreshed once, by update_queued_tracks
+            queued.extend(self.queue_tracks(uris, at_position=at_position, refresh=False))
+
         self.queue.update_queued_tracks(media_id, media_type, tracks=queued)
 
-    def queue_tracks(self, uris, at_position=None):
-        """Queue tracks"""
+    def queue_tracks(self, uris, at_position=None, refresh=True):
+        """Queue tracks, adding at most ENQUEUE_BATCH_SIZE uris per request
+
+        Args:
+            uris: Track URIs to add
+            at_position: Queue index to insert at, or None to append
+            refresh: Refresh the queue mirror afterwards
+        """
         ret = []
         if len(uris) > 0:
-            ret = self.api.tracklist.add(uris=uris, at_position=at_position)
-            self.queue.update_tracks()
+            for start in range(0, len(uris), ENQUEUE_BATCH_SIZE):
+                ret.extend(
+                    self.api.tracklist.add(
+                        uris=uris[start:start + ENQUEUE_BATCH_SIZE],
+                        at_position=None if at_position is None else at_position + start,
+                    ) or []
+                )
+            if refresh:
+                self.queue.update_tracks()
         return ret
 
-    async def restore_snapshot(self):
-        """Restore a snapshot"""
-        if self.snapshot is None:
-            _LOGGER.error("Cannot restore snapshot: no snapshot available for %s:%d", self.hostname, self.port)
-            raise ValueError("No snapshot available to restore")
-        self.media_stop()
-        self.clear_queue()
-        self.queue_tracks(self.snapshot.get("queue_list",[]))
-        self.set_volume(self.snapshot.get("volume"))
-        self.set_mute(self.snapshot.get("muted"))
-        if self.snapshot.get("state", MediaPlayerState.IDLE) in [MediaPlayerState.PLAYING, MediaPlayerState.PAUSED]:
-            current_tracks = self.api.tracklist.get_tl_tracks()
-            self.api.playback.play(
-                tlid=current_tracks[self.snapshot.get("queue_index")].tlid
-            )
+    def __restore_snapshot_settings(self, snapshot: dict) -> None:
+        """Stop playback, clear the queue and restore volume, mute and modes in one batch"""
+        calls = [
+            ("core.playback.stop", {}),
+            ("core.tracklist.clear", {}),
+        ]
+        if snapshot.get("volume") is not None:
+            calls.append(("core.mixer.set_volume", {"volume": max(0, min(100, snapshot["volume"]))}))
+        if snapshot.get("muted") is not None:
+            calls.append(("core.mixer.set_mute", {"mute": snapshot["muted"]}))
+        if snapshot.get("repeat_mode") is not None:
+            calls.append(("core.tracklist.set_repeat", {"value": snapshot["repeat_mode"] in [RepeatMode.ALL, RepeatMode.ONE]}))
+            calls.append(("core.tracklist.set_single", {"value": snapshot["repeat_mode"] == RepeatMode.ONE}))
+        if snapshot.get("shuffled") is not None:
+            calls.append(("core.tracklist.set_random", {"value": snapshot["shuffled"]}))
+        self.api.rpc_batch(calls)
+
+    def __play_snapshot_track(self, uri: str) -> str | None:
+        """Queue and play the current track of a snapshot, return the playback state
 
-            count = 0
-            while True:
-                state = self.api.playback.get_state()
-                if state in [MediaPlayerState.PLAYING, MediaPlayerState.PAUSED]:
-                    break
-                if count >= RESTORE_RETRY_MAX:
-                    _LOGGER.error(
-                        "Media player is not playing after %d retries. Restoring the snapshot failed for %s:%d",
-                        RESTORE_RETRY_MAX,
-                        self.hostname,
-                        self.port
-                    )
-                    self.snapshot = None
+        Raises:
+            MopidyError: If the track could not be queued or played
+        """
+        results = self.api.rpc_batch([
+            ("core.tracklist.add", {"uris": [uri]}),
+            ("core.playback.play", {}),
+            ("core.playback.get_state", {}),
+        ])
+        if not results[0]:
+            raise MopidyError(f"Track {uri} could not be added to the queue")
+        return results[2]
+
+    def __restore_snapshot_queue(self, uris: list[str]) -> None:
+        """Replace the queue with all the tracks of a snapshot"""
+        self.api.tracklist.clear()
+        self.queue_tracks(uris)
+
+    def __resume_snapshot_position(self, snapshot: dict) -> None:
+        """Seek to the snapshot position and pause if needed"""
+        calls = []
+        if (snapshot.get("mediaposition") or 0) > 0:
+            calls.append(("core.playback.seek", {"time_position": snapshot["mediaposition"] * 1000}))
+        if snapshot["state"] == MediaPlayerState.PAUSED:
+            calls.append(("core.playback.pause", {}))
+        self.api.rpc_batch(calls)
+
+    async def __async_restore_remaining_tracks(self, before: list[str], after: list[str]) -> None:
+        """Add the snapshot tracks around the playing track in batches"""
+        # Tracks after the current one first, so skipping ahead works early on
+        batches = [
+            partial(self.api.tracklist.add, uris=after[start:start + ENQUEUE_BATCH_SIZE])
+            for start in range(0, len(after), ENQUEUE_BATCH_SIZE)
+        ] + [
+            partial(self.api.tracklist.add, uris=before[start:start + ENQUEUE_BATCH_SIZE], at_position=start)
+            for start in range(0, len(before), ENQUEUE_BATCH_SIZE)
+        ]
+        try:
+            for batch in batches:
+                # Checked between batches, so a new restore never races a running add
+                if self._restore_abort:
                     return
-                count = count + 1
-                await asyncio.sleep(RESTORE_RETRY_INTERVAL_SECONDS)
+                await self.hass.async_add_executor_job(batch)
+        except (reConnectionError, MopidyError) as error:
+            _LOGGER.error(
+                "An error occurred restoring the queue on Mopidy server at %s:%d, the queue is incomplete",
+                self.hostname,
+                self.port
+            )
+            _LOGGER.debug(str(error))
+        finally:
+            if not self._restore_abort:
+                self.__mark_dirty(DIRTY_QUEUE)
+
+    @property
+    def restoring(self) -> bool:
+        """Return whether a restored queue is still being filled"""
+        return self._restore_task is not None and not self._restore_task.done()
+
+    async def __async_stop_restore(self) -> None:
+        """Stop filling a restored queue, once the batch being added is done"""
+        if not self.restoring:
+            return
+        self._restore_abort = True
+        try:
+            await self._restore_task
+        finally:
+            self._restore_abort = False
+
+    @callback
+    def __resolve_playback_waiters(self, state: str | None) -> None:
+        """Wake up restores waiting for playback to start"""
+        if state not in [MediaPlayerState.PLAYING, MediaPlayerState.PAUSED]:
+            return
+        for waiter in self._playback_waiters:
+            if not waiter.done():
+                waiter.set_result(state)
+
+    async def restore_snapshot(self, slot: str = DEFAULT_SNAPSHOT_SLOT):
+        """Restore a snapshot
+
+        The current track of the snapshot is queued and started first; the
+        tracks around it are added in background batches once it plays.
+
+        Args:
+            slot: Name of the snapshot to restore
+
+        Raises:
+            ValueError: If no snapshot is stored in slot
+            MopidyError: If the current track could not be started; the
+                whole queue is added without playing it instead
+        """
+        snapshot = self.snapshots.get(slot)
+        if snapshot is None:
+            _LOGGER.error(
+                "Cannot restore snapshot: no snapshot '%s' available for %s:%d",
+                slot,
+                self.hostname,
+                self.port
+            )
+            raise ValueError(f"No snapshot '{slot}' available to restore")
+
+        await self.__async_stop_restore()
+
+        await self.hass.async_add_executor_job(self.__restore_snapshot_settings, snapshot)
+
+        uris = snapshot.get("queue_list", [])
+        if (
+            snapshot.get("state", MediaPlayerState.IDLE) not in [MediaPlayerState.PLAYING, MediaPlayerState.PAUSED]
+            or len(uris) == 0
+        ):
+            await self.hass.async_add_executor_job(self.queue_tracks, uris)
+            return
+
+        # queue_index is the 1-based queue position
+        index = min(max((snapshot.get("queue_index") or 1) - 1, 0), len(uris) - 1)
+
+        # Register before playing, so the playback_state_changed event cannot be missed
+        started = self.hass.loop.create_future()
+        self._playback_waiters.add(started)
+        try:
+            state = await self.hass.async_add_executor_job(self.__play_snapshot_track, uris[index])
+            if state not in [MediaPlayerState.PLAYING, MediaPlayerState.PAUSED]:
+                await asyncio.wait_for(started, self.restore_timeout)
+        except asyncio.TimeoutError:
+            _LOGGER.error(
+                "Media player is not playing after %d seconds. Restoring the snapshot failed for %s:%d",
+                self.restore_timeout,
+                self.hostname,
+                self.port
+            )
+            self.snapshots.remove(slot)
+            return
+        except MopidyError:
+            _LOGGER.error(
+                "Could not start the current track of snapshot '%s' on %s:%d, adding the whole queue instead",
+                slot,
+                self.hostname,
+                self.port
+            )
+            await self.hass.async_add_executor_job(self.__restore_snapshot_queue, uris)
+            raise
+        finally:
+            self._playback_waiters.discard(started)
 
-            if self.snapshot.get("mediaposition",0) > 0:
-                self.media_seek(self.snapshot["mediaposition"])
+        await self.hass.async_add_executor_job(self.__resume_snapshot_position, snapshot)
 
-            if self.snapshot["state"] == MediaPlayerState.PAUSED:
-                self.media_pause()
+        self.snapshots.remove(slot)
 
-            self.snapshot = None
-            self._attr_snapshot_at = None
+        self._restore_task = self.hass.async_create_background_task(
+            self.__async_restore_remaining_tracks(uris[:index], uris[index + 1:]),
+            f"mopidy restore queue {self.hostname}:{self.port}",
+        )
 
     def create_playlist(self, name: str) -> None:
         """Create a new playlist from the current queue.
@@ -1346,25 +2251,21 @@ class MopidySpeaker:
             queue_uris = self.queue.uri_list
             
             # Check for existing playlist with same name
-            existing_playlist = None
-            for playlist in self.library.playlists:
-                if playlist.name == name:
-                    existing_playlist = playlist
-                    break
+            existing_uri = self.find_playlist_uri(name)
             
-            if existing_playlist:
+            if existing_uri:
                 # Overwrite existing playlist
-                self.api.playlists.save(playlist={
-                    'uri': existing_playlist.uri,
-                    'name': name,
-                    'tracks': [{'uri': uri} for uri in queue_uris]
-                })
+                self.__save_playlist_tracks(existing_uri, name, queue_uris)
             else:
                 # Create new playlist
-                self.api.playlists.create(name=name, tracks=[{'uri': uri} for uri in queue_uris])
-            
-            # Refresh playlist list
-            self.__get_source_list()
+                playlist = self.api.playlists.create(name=name, tracks=[{'uri': uri} for uri in queue_uris])
+                if playlist is not None:
+                    self.__store_playlist(playlist.uri, playlist.name)
+                    self._playlist_hashes[playlist.uri] = playlist_content_hash(
+                        [x.uri for x in getattr(playlist, 'tracks', None) or []]
+                    )
+                else:
+                    self._source_list_stale = True
         except reConnectionError as error:
             self._attr_is_available = False
             _LOGGER.error(
@@ -1392,8 +2293,7 @@ class MopidySpeaker:
         """
         try:
             self.api.playlists.delete(uri=uri)
-            # Refresh playlist list
-            self.__get_source_list()
+            self.__forget_playlist(uri)
         except reConnectionError as error:
             self._attr_is_available = False
             _LOGGER.error(
@@ -1427,22 +2327,22 @@ class MopidySpeaker:
             # Get queue track URIs
             queue_uris = self.queue.uri_list
             
-            # Get playlist to verify it exists and get name
-            playlist = self.api.playlists.lookup(uri=uri)
-            if not playlist:
-                raise ValueError(f"Playlist not found: {uri}")
-            
-            playlist_name = playlist.name if hasattr(playlist, 'name') else uri.split(':')[-1]
+            tracks = None
+            if not self._source_list_stale and self.websocket_connected and uri in self._playlists:
+                # Known playlist, kept current by the playlist events
+                playlist_name = self._playlists[uri]
+            else:
+                # Get playlist to verify it exists and get name
+                playlist = self.api.playlists.lookup(uri=uri)
+                if not playlist:
+                    raise ValueError(f"Playlist not found: {uri}")
+                
+                playlist_name = playlist.name if hasattr(playlist, 'name') else uri.split(':')[-1]
+                tracks = getattr(playlist, 'tracks', None) or []
             
             # Save playlist with queue contents
-            self.api.playlists.save(playlist={
-                'uri': uri,
-                'name': playlist_name,
-                'tracks': [{'uri': uri} for uri in queue_uris]
-            })
-            
-            # Refresh playlist list
-            self.__get_source_list()
+            self.__save_playlist_tracks(uri, playlist_name, queue_uris, tracks)
+            self.__store_playlist(uri, playlist_name)
         except reConnectionError as error:
             self._attr_is_available = False
             _LOGGER.error(
@@ -1476,6 +2376,57 @@ class MopidySpeaker:
             _LOGGER.debug("Connection error details: %s", str(error))
             raise
 
+    def refresh_library(self, uri: str | None = None) -> None:
+        """Refresh the library on the backend and drop cached search results.
+        
+        Args:
+            uri: Optional library URI to limit the refresh to
+            
+        Raises:
+            reConnectionError: If Mopidy server is unavailable
+        """
+        try:
+            self.library.refresh(uri)
+        except reConnectionError as error:
+            self._attr_is_available = False
+            _LOGGER.error(
+                "An error occurred refreshing the library on Mopidy server at %s:%d",
+                self.hostname,
+                self.port
+            )
+            _LOGGER.debug("Connection error details: %s", str(error))
+            raise
+
+    def lookup_tracks(self, uris: list[str]) -> list[dict[str, Any]]:
+        """Get detailed track metadata for many track URIs at once.
+        
+        Args:
+            uris: Track URIs to lookup
+            
+        Returns:
+            List with the metadata of every track found, in the order of uris
+            
+        Raises:
+            reConnectionError: If Mopidy server is unavailable
+        """
+        try:
+            found = self.library.lookup_tracks(uris)
+            return [
+                { key: found[uri][key] for key in LOOKUP_TRACK_FIELDS }
+                for uri in dict.fromkeys(uris)
+                if uri in found
+            ]
+        except reConnectionError as error:
+            self._attr_is_available = False
+            _LOGGER.error(
+                "An error occurred looking up %d tracks on Mopidy server at %s:%d",
+                len(uris),
+                self.hostname,
+                self.port
+            )
+            _LOGGER.debug("Connection error details: %s", str(error))
+            raise
+
     def lookup_track(self, uri: str) -> dict[str, Any]:
         """Get detailed track metadata for a track URI.
         
@@ -1490,44 +2441,11 @@ class MopidySpeaker:
             reConnectionError: If Mopidy server is unavailable
         """
         try:
-            tracks = self.api.library.lookup(uris=[uri])
-            if not tracks or len(tracks) == 0 or not tracks[0]:
+            found = self.library.lookup_tracks([uri])
+            if uri not in found:
                 raise ValueError(f"Track not found: {uri}")
             
-            track = tracks[0]
-            metadata: dict[str, Any] = {
-                'uri': track.uri if hasattr(track, 'uri') else uri,
-                'name': track.name if hasattr(track, 'name') else None,
-                'artists': [],
-                'album': None,
-                'length': track.length if hasattr(track, 'length') else None,
-                'track_no': track.track_no if hasattr(track, 'track_no') else None,
-                'date': None,
-                'genre': None,
-            }
-            
-            # Extract artists
-            if hasattr(track, 'artists') and track.artists:
-                metadata['artists'] = [
-                    {'name': artist.name, 'uri': artist.uri} if hasattr(artist, 'name') else {'uri': artist.uri if hasattr(artist, 'uri') else None}
-                    for artist in track.artists
-                ]
-            
-            # Extract album
-            if hasattr(track, 'album') and track.album:
-                metadata['album'] = {
-                    'name': track.album.name if hasattr(track.album, 'name') else None,
-                    'uri': track.album.uri if hasattr(track.album, 'uri') else None,
-                    'date': track.album.date if hasattr(track.album, 'date') else None,
-                }
-            
-            # Extract date and genre if available
-            if hasattr(track, 'date'):
-                metadata['date'] = track.date
-            if hasattr(track, 'genre'):
-                metadata['genre'] = track.genre
-            
-            return metadata
+            return { key: found[uri][key] for key in LOOKUP_TRACK_FIELDS }
         except reConnectionError as error:
             self._attr_is_available = False
             _LOGGER.error(
@@ -1618,6 +2536,12 @@ class MopidySpeaker:
             if 'track_name' in query and query['track_name']:
                 mopidy_query['track_name'] = [query['track_name']]
             
+            # Serve repeated queries from the search cache
+            cache_key = search_cache_key("find_exact", None, mopidy_query, True)
+            cached = self.library.cached_search_result(cache_key)
+            if cached is not None:
+                return cached
+            
             # Call find_exact API
             search_results = self.api.library.find_exact(query=mopidy_query, uris=None)
             
@@ -1654,6 +2578,7 @@ class MopidySpeaker:
                             if matches:
                                 track_uris.append(track.uri)
             
+            self.library.cache_search_result(cache_key, track_uris)
             return track_uris
         except reConnectionError as error:
             self._attr_is_available = False
@@ -1667,10 +2592,10 @@ class MopidySpeaker:
 
     def select_source(self, value):
         """play the selected source"""
-        for source in self.library.playlists:
-            if value == source.name:
-                self.play_media(MediaType.PLAYLIST, source.uri)
-                return
+        uri = self.find_playlist_uri(value)
+        if uri is not None:
+            self.play_media(MediaType.PLAYLIST, uri)
+            return
         raise ValueError(f"Could not find source '{value}'")
 
     def set_consume_mode(self, value):
@@ -1719,12 +2644,33 @@ class MopidySpeaker:
             self.api.mixer.set_volume(value)
             self._attr_volume_level = value
 
-    def take_snapshot(self):
-        """Take a snapshot"""
-        self.update()
-        self._attr_snapshot_at = dt_util.utcnow()
-        self.snapshot = {
-            "mediaposition": self.queue.current_track_position,
+    def take_snapshot(self, slot: str = DEFAULT_SNAPSHOT_SLOT, overwrite: bool = True) -> bool:
+        """Take a snapshot of the mirrored state, without polling the server
+
+        Args:
+            slot: Name of the snapshot
+            overwrite: Replace a snapshot already stored in slot
+
+        Returns:
+            Whether a snapshot was stored
+
+        Raises:
+            ValueError: If a restored queue is still being filled
+        """
+        if self.restoring:
+            raise ValueError("A snapshot restore is still adding tracks to the queue")
+        if not overwrite and slot in self.snapshots:
+            return False
+
+        now = dt_util.utcnow()
+        position = self.queue.current_track_position
+        updated_at = self.queue.current_track_position_updated_at
+        if position is not None and updated_at is not None and self.state == MediaPlayerState.PLAYING:
+            position += int((now - updated_at).total_seconds())
+
+        self.snapshots.store(slot, {
+            "taken_at": now.isoformat(),
+            "mediaposition": position,
             "muted": self.is_muted,
             "repeat_mode": self.repeat,
             "shuffled": self.is_shuffled,
@@ -1732,96 +2678,261 @@ class MopidySpeaker:
             "queue_list": self.queue.uri_list,
             "queue_index": self.queue.position,
             "volume": self.volume_level,
-        }
+        })
+        return True
 
     def update(self):
-        """Update the data known by the Speaker Object"""
-        self.__get_software_version()
+        """Update the data known by the Speaker Object
+
+        The refresh stops starting new calls once update_deadline seconds have
+        passed; values already fetched in this cycle are kept.
+        """
+        deadline = time.monotonic() + self.update_deadline
+        if self.breaker.is_open:
+            # Fail fast while the server is known to be unreachable
+            self._attr_is_available = False
+        else:
+            self.__get_software_version()
 
         if not self._attr_is_available:
             self.__clear()
             self.queue.clear_current_track()
             return
 
-        if not self.api.wsclient.wsthread.is_alive():
-            _LOGGER.warning("The websocket connection was interrupted, re-create connection")
-            del self.api
-            self.__connect()
-
-        self.__get_supported_uri_schemes()
-        self.__get_consume_mode()
-        self.__get_source_list()
-        self.__get_volume()
-        self.__get_shuffle_mode()
-        self.__get_state()
-        self.__get_repeat_mode()
-
-        self.queue.update()
+        steps = [
+            self.__get_supported_uri_schemes,
+            self.__get_consume_mode,
+            self.__get_stale_source_list,
+            self.__get_volume,
+            self.__get_shuffle_mode,
+            self.__get_state,
+            self.__get_repeat_mode,
+            self.queue.update_queue_information,
+            self.queue.update_tracks,
+            self.queue.update_current_track,
+        ]
+        for index, step in enumerate(steps):
+            if time.monotonic() >= deadline:
+                _LOGGER.debug(
+                    "Refresh of Mopidy server at %s:%d exceeded %d seconds, skipped %d of %d steps",
+                    self.hostname,
+                    self.port,
+                    self.update_deadline,
+                    len(steps) - index,
+                    len(steps)
+                )
+                break
+            step()
 
     def volume_down(self):
         """Turn down the volume"""
         if self.volume_level is not None:
-            self.set_volume(self.volume_level - VOLUME_STEP_PERCENT)
+            self.set_volume(self.volume_level - self.volume_step)
 
     def volume_up(self):
         """Turn up the volume"""
         if self.volume_level is not None:
-            self.set_volume(self.volume_level + VOLUME_STEP_PERCENT)
+            self.set_volume(self.volume_level + self.volume_step)
+
+    @callback
+    def async_shutdown(self) -> None:
+        """Stop listening to server events and filling a restored queue"""
+        if self.restoring:
+            self._restore_abort = True
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        self.__async_stop_events()
+
+    @callback
+    def __async_start_events(self) -> None:
+        """Listen to the Mopidy websocket events"""
+        if self._ws_unregister is None:
+            self._ws_unregister = async_get_websocket_manager(self.hass).async_register(
+                f"ws://{self.hostname}:{self.port}/mopidy/ws",
+                self.events.put,
+                self.__ws_connection_changed,
+            )
+
+    @callback
+    def __async_stop_events(self) -> None:
+        """Stop listening to the Mopidy websocket events"""
+        if self._ws_unregister is not None:
+            self._ws_unregister()
+            self._ws_unregister = None
+        self._ws_connected = None
+
+    @callback
+    def apply_options(self, options: dict[str, Any]) -> None:
+        """Apply the options of the config entry"""
+        self.library.search_cache_size = options.get(CONF_SEARCH_CACHE_SIZE, SEARCH_CACHE_MAX_SIZE)
+        self.library.track_cache_size = options.get(CONF_TRACK_CACHE_SIZE, TRACK_CACHE_MAX_SIZE)
+        attribute_window = options.get(CONF_QUEUE_ATTRIBUTE_WINDOW, DEFAULT_QUEUE_ATTRIBUTE_WINDOW)
+        if attribute_window != self.queue.attribute_window:
+            self.queue.attribute_window = attribute_window
+            if self._setup_done:
+                # Rebuild the queue_tracks attribute with the new window
+                self.__mark_dirty(DIRTY_QUEUE)
+        self.rpc_timeout = (
+            options.get(CONF_RPC_CONNECT_TIMEOUT, RPC_CONNECT_TIMEOUT_SECONDS),
+            options.get(CONF_RPC_TIMEOUT, RPC_TIMEOUT_SECONDS),
+        )
+        self.api.timeout = self.rpc_timeout
+        self.rpc_long_timeout = options.get(CONF_RPC_LONG_TIMEOUT, RPC_LONG_TIMEOUT_SECONDS)
+        self.api.long_timeout = self.rpc_long_timeout
+        self.update_deadline = options.get(CONF_UPDATE_DEADLINE, UPDATE_DEADLINE_SECONDS)
+        self.restore_timeout = options.get(CONF_RESTORE_TIMEOUT, RESTORE_TIMEOUT_SECONDS)
+        self.volume_step = options.get(CONF_VOLUME_STEP, VOLUME_STEP_PERCENT)
+
+        self.update_mode = options.get(CONF_UPDATE_MODE, UPDATE_MODE_PUSH)
+        if self._setup_done:
+            if self.update_mode == UPDATE_MODE_PUSH:
+                self.__async_start_events()
+            else:
+                self.__async_stop_events()
+
+    @callback
+    def __ws_apply_event(self, event, data):
+        """Apply an event received from the Mopidy websocket"""
+        handler = self._ws_handlers.get(event)
+        if handler is not None and self.entity is not None:
+            handler(data)
+
+    @callback
+    def __ws_events_dropped(self):
+        """Events were dropped from a full event queue, resynchronize"""
+        if self.entity is not None:
+            self.entity.force_update_ha_state()
+
+    @callback
+    def __ws_connection_changed(self, connected):
+        """The websocket connection went up or down"""
+        reconnected = connected and self._ws_connected is False
+        self._ws_connected = connected
+        if reconnected and self.entity is not None:
+            # Events may have been missed while disconnected, or the server restarted
+            self.__invalidate_session_cache()
+            self.library.clear_search_cache()
+            self.entity.force_update_ha_state()
+
+    @callback
+    def __mark_dirty(self, *kinds):
+        """Flag state to refresh; bursts of events are flushed together"""
+        self._dirty.update(kinds)
+        if self._flush_handle is None and self._flush_task is None:
+            self._flush_handle = self.hass.loop.call_later(
+                EVENT_COALESCE_SECONDS, self.__start_flush
+            )
+
+    @callback
+    def __start_flush(self):
+        """Start flushing the pending dirty flags"""
+        self._flush_handle = None
+        self._flush_task = self.hass.async_create_background_task(
+            self.__async_flush_dirty(), f"mopidy refresh {self.hostname}:{self.port}"
+        )
+
+    async def __async_flush_dirty(self):
+        """Run every flagged refresh once, then write the state once"""
+        try:
+            while self._dirty:
+                dirty = self._dirty
+                self._dirty = set()
+                if dirty - {DIRTY_STATE}:
+                    await self.hass.async_add_executor_job(self.__refresh_dirty, dirty)
+                if self.entity is not None and self.entity.hass is not None:
+                    self.entity.async_write_ha_state_if_changed()
+        finally:
+            self._flush_task = None
+
+    def __refresh_dirty(self, dirty):
+        """Fetch the flagged state from the Mopidy server"""
+        if DIRTY_OPTIONS in dirty:
+            self.__get_consume_mode()
+            self.__get_repeat_mode()
+            self.__get_shuffle_mode()
+        if DIRTY_PLAYLISTS in dirty:
+            self.__get_source_list()
+        if DIRTY_QUEUE in dirty:
+            self.queue.update_queue_information()
+        if DIRTY_CURRENT_TRACK in dirty:
+            # Also refreshes the current track image
+            self.queue.update_current_track()
+        elif DIRTY_IMAGE in dirty:
+            self.queue.update_current_image_url()
 
     @callback
     def __ws_mute_changed(self, state_info):
         """Mute state has changed"""
         self._attr_is_volume_muted = state_info.mute
-        self.entity.force_update_ha_state()
+        self.__mark_dirty(DIRTY_STATE)
 
     @callback
     def __ws_options_changed(self, options_info):
         """speaker options have changed"""
-        self.hass.async_add_executor_job(
-            self.__get_consume_mode
-        )
-        self.hass.async_add_executor_job(
-            self.__get_repeat_mode
-        )
-        self.hass.async_add_executor_job(
-            self.__get_shuffle_mode
+        self.__mark_dirty(DIRTY_OPTIONS)
+
+    @callback
+    def __ws_playlist_changed(self, playlist_info):
+        """A playlist was created, renamed or its tracks changed"""
+        playlist = playlist_info.playlist
+        if self._source_list_stale:
+            self._playlist_hashes.pop(playlist.uri, None)
+            self.__mark_dirty(DIRTY_PLAYLISTS)
+            return
+        self.__store_playlist(playlist.uri, playlist.name)
+        self._playlist_hashes[playlist.uri] = playlist_content_hash(
+            [x.uri for x in getattr(playlist, 'tracks', None) or []]
         )
-        self.entity.force_update_ha_state()
+        self.__mark_dirty(DIRTY_STATE)
+
+    @callback
+    def __ws_playlist_deleted(self, playlist_info):
+        """A playlist was deleted"""
+        if self._source_list_stale:
+            self.__mark_dirty(DIRTY_PLAYLISTS)
+            return
+        self.__forget_playlist(playlist_info.uri)
+        self.__mark_dirty(DIRTY_STATE)
+
+    @callback
+    def __ws_playlists_loaded(self, playlist_info):
+        """The backends (re)loaded their playlists"""
+        self._source_list_stale = True
+        self._playlist_hashes = {}
+        self.__mark_dirty(DIRTY_PLAYLISTS)
 
     @callback
     def __ws_playback_state_changed(self, state_info):
         """playback has changed"""
         self._attr_state = self.__eval_state(state_info.new_state)
+        self.__resolve_playback_waiters(state_info.new_state)
         if state_info.new_state == "stopped":
             self.queue.clear_current_track()
-        self.entity.force_update_ha_state()
+        self.__mark_dirty(DIRTY_STATE)
 
         if state_info.new_state == "playing":
-            self.hass.async_add_executor_job(
-                self.queue.update_current_track, self.entity.force_update_ha_state
-            )
+            self.queue.request_position_refresh()
+            self.__mark_dirty(DIRTY_CURRENT_TRACK)
 
     @callback
     def __ws_seeked(self, seek_info):
         """Track time position has changed"""
         self.queue.set_current_track_position(int(seek_info.time_position / 1000))
-        self.entity.force_update_ha_state()
+        self.__mark_dirty(DIRTY_STATE)
 
     @callback
     def __ws_stream_title_changed(self, stream_info):
         """Stream title changed"""
         self.queue.set_stream_title(stream_info.title)
-        self.entity.force_update_ha_state()
-
-        self.hass.async_add_executor_job(
-            self.queue.update_current_track, self.entity.force_update_ha_state
-        )
+        self.__mark_dirty(DIRTY_CURRENT_TRACK)
 
     @callback
     def __ws_track_playback_paused(self, playback_state):
         """Playback of track was paused"""
         self._attr_state = self.__eval_state("paused")
-        self.entity.force_update_ha_state()
+        self.queue.set_current_track_position(int(playback_state.time_position/1000))
+        self.__mark_dirty(DIRTY_STATE)
 
     @callback
     def __ws_track_playback_resumed(self, playback_state):
@@ -1834,7 +2945,7 @@ class MopidySpeaker:
             current = True
         )
         self.queue.set_current_track_position(int(playback_state.time_position/1000))
-        self.entity.force_update_ha_state()
+        self.__mark_dirty(DIRTY_STATE)
 
     @callback
     def __ws_track_playback_started(self, playback_state):
@@ -1844,27 +2955,25 @@ class MopidySpeaker:
             tlid = playback_state.tl_track.tlid,
             current = True
         )
-        self.entity.force_update_ha_state()
-        self.hass.async_add_executor_job(
-            self.queue.update_current_image_url, playback_state.tl_track.track.uri, self.entity.force_update_ha_state
+        self.queue.set_current_track_position(0)
+        self.history.record(
+            self._format_history_entry(playback_state.tl_track.track)
         )
-
-        self.hass.async_add_executor_job(
-            self.queue.update_current_track, self.entity.force_update_ha_state
+        self.play_stats.record(
+            self.library.track_metadata(playback_state.tl_track.track)
         )
+        self.__mark_dirty(DIRTY_IMAGE, DIRTY_CURRENT_TRACK)
 
     @callback
     def __ws_tracklist_changed(self, tracklist_info):
         """The queue has changed"""
-        self.hass.async_add_executor_job(
-            self.queue.update_queue_information, self.entity.force_update_ha_state
-        )
+        self.__mark_dirty(DIRTY_QUEUE)
 
     @callback
     def __ws_volume_changed(self, volume_info):
         """The volume was changed"""
         self._attr_volume_level = volume_info.volume
-        self.entity.force_update_ha_state()
+        self.__mark_dirty(DIRTY_STATE)
 
     @property
     def consume_mode(self):
@@ -1898,8 +3007,24 @@ class MopidySpeaker:
 
     @property
     def snapshot_taken_at(self):
-        """Return the time the snapshot is taken at"""
-        return self._attr_snapshot_at
+        """Return the time the default snapshot is taken at"""
+        taken_at = self.snapshots.taken_at(DEFAULT_SNAPSHOT_SLOT)
+        return None if taken_at is None else dt_util.parse_datetime(taken_at)
+
+    @property
+    def websocket_connected(self):
+        """Return whether the event websocket is connected"""
+        return self._ws_connected is True
+
+    @property
+    def state_fingerprint(self):
+        """Return a value that changes whenever the exposed state changes"""
+        return (self.state_version, self.queue.state_version, self.snapshots.version)
+
+    @property
+    def snapshot_slots(self):
+        """Return the names of the stored snapshots"""
+        return self.snapshots.slots
 
     @property
     def software_version(self):
@@ -0,0 +1,161 @@
+"""Play count statistics of a Mopidy server."""
+from collections import Counter
+import datetime
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+import homeassistant.util.dt as dt_util
+
+from .const import (
+    DOMAIN,
+    STATS_MAX_TOTALS,
+    STATS_RETENTION_DAYS,
+    STATS_SAVE_DELAY_SECONDS,
+    STATS_STORAGE_VERSION,
+)
+
+STATS_GROUPS = ("track", "artist", "album")
+STATS_PERIODS = {
+    "day": 1,
+    "week": 7,
+    "month": 30,
+    "all": None,
+}
+
+
+class MopidyPlayStats:
+    """Incrementally maintained play counts, persisted in Home Assistant storage.
+
+    Counts are kept per track uri, artist and album (by uri when it has one),
+    both as all-time totals and in daily buckets, so top lists never rescan
+    the playback history. Only the STATS_MAX_TOTALS most played entries of
+    each group are kept in the totals.
+    """
+
+    def __init__(self, hass: HomeAssistant, storage_id: str) -> None:
+        """Initialize the statistics"""
+        self.hass = hass
+        self._totals: dict[str, Counter[str]] = {group: Counter() for group in STATS_GROUPS}
+        self._days: dict[str, dict[str, Counter[str]]] = {}
+        self._tracks: dict[str, dict[str, Any]] = {}
+        self._albums: dict[str, dict[str, Any]] = {}
+        self._store: Store = Store(
+            hass, STATS_STORAGE_VERSION, f"{DOMAIN}.stats.{storage_id}"
+        )
+
+    async def async_load(self) -> None:
+        """Load the persisted statistics"""
+        data = await self._store.async_load()
+        if data is None:
+            return
+
+        self._totals = {
+            group: Counter(data.get("totals", {}).get(group, {})) for group in STATS_GROUPS
+        }
+        self._days = {
+            day: {group: Counter(counts.get(group, {})) for group in STATS_GROUPS}
+            for day, counts in data.get("days", {}).items()
+        }
+        self._tracks = data.get("tracks", {})
+        self._albums = data.get("albums", {})
+
+    def __data_to_save(self) -> dict[str, Any]:
+        """Return the statistics in their storage format"""
+        return {
+            "totals": {group: dict(counts) for group, counts in self._totals.items()},
+            "days": {
+                day: {group: dict(counts) for group, counts in buckets.items()}
+                for day, buckets in self._days.items()
+            },
+            "tracks": self._tracks,
+            "albums": self._albums,
+        }
+
+    def __prune(self, today: datetime.date) -> None:
+        """Drop old daily buckets, rarely played totals and unreferenced details"""
+        oldest = (today - datetime.timedelta(days=STATS_RETENTION_DAYS - 1)).isoformat()
+        for day in [day for day in self._days if day < oldest]:
+            del self._days[day]
+
+        for group, counts in self._totals.items():
+            if len(counts) > STATS_MAX_TOTALS:
+                self._totals[group] = Counter(dict(counts.most_common(STATS_MAX_TOTALS)))
+
+        for group, details in [("track", self._tracks), ("album", self._albums)]:
+            referenced = set(self._totals[group])
+            for buckets in self._days.values():
+                referenced.update(buckets[group])
+            for key in [key for key in details if key not in referenced]:
+                del details[key]
+
+    def record(self, metadata: dict[str, Any]) -> None:
+        """Count one play of a track, given its normalized metadata"""
+        uri = metadata.get("uri")
+        if not uri:
+            return
+
+        today = dt_util.now().date()
+        day = today.isoformat()
+        if day not in self._days:
+            self._days[day] = {group: Counter() for group in STATS_GROUPS}
+            self.__prune(today)
+
+        # Albums sharing a name ("Greatest Hits") are told apart by their uri
+        album = metadata.get("album") or {}
+        album_key = album.get("uri") or metadata.get("album_name")
+        keys = {
+            "track": [uri],
+            "artist": [x["name"] for x in metadata.get("artists", []) if x.get("name")],
+            "album": [album_key] if album_key else [],
+        }
+        for group, group_keys in keys.items():
+            self._totals[group].update(group_keys)
+            self._days[day][group].update(group_keys)
+
+        self._tracks[uri] = {
+            "track_name": metadata.get("name"),
+            "artist": metadata.get("artist"),
+            "album": metadata.get("album_name"),
+        }
+        if album_key:
+            self._albums[album_key] = {
+                "uri": album.get("uri"),
+                "album": metadata.get("album_name") or album_key,
+                "artist": metadata.get("first_artist"),
+            }
+        self.hass.add_job(
+            self._store.async_delay_save, self.__data_to_save, STATS_SAVE_DELAY_SECONDS
+        )
+
+    def top(self, group_by: str = "track", period: str = "week", limit: int = 10) -> list[dict[str, Any]]:
+        """Return the most played tracks, artists or albums of a period
+
+        Raises:
+            ValueError: If group_by or period is unknown
+        """
+        if group_by not in STATS_GROUPS:
+            raise ValueError(f"Unknown statistics group '{group_by}'")
+        if period not in STATS_PERIODS:
+            raise ValueError(f"Unknown statistics period '{period}'")
+
+        days = STATS_PERIODS[period]
+        if days is None:
+            counts = self._totals[group_by]
+        else:
+            oldest = (dt_util.now().date() - datetime.timedelta(days=days - 1)).isoformat()
+            counts = Counter()
+            for day, buckets in self._days.items():
+                if day >= oldest:
+                    counts.update(buckets[group_by])
+
+        result = []
+        for key, count in counts.most_common(limit):
+            if group_by == "track":
+                result.append({"uri": key, **self._tracks.get(key, {}), "count": count})
+            elif group_by == "album":
+                # Counts stored before albums were keyed by uri are keyed by name
+                result.append({"album": key, **self._albums.get(key, {}), "count": count})
+            else:
+                result.append({group_by: key, "count": count})
+        return result
@@ -0,0 +1,219 @@
+"""Websocket event connections of all Mopidy servers, run on the HA event loop."""
+import asyncio
+from collections import deque, namedtuple
+from collections.abc import Callable
+import json
+import logging
+import random
+import threading
+from typing import Any
+
+import aiohttp
+from mopidyapi.parsedata import deserialize_mopidy
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+
+from .const import (
+    DATA_WEBSOCKETS,
+    WS_EVENT_QUEUE_SIZE,
+    WS_HEARTBEAT_SECONDS,
+    WS_RECONNECT_MAX_SECONDS,
+    WS_RECONNECT_MIN_SECONDS,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+EventHandler = Callable[[str, Any], None]
+ConnectionHandler = Callable[[bool], None]
+
+# Events of which only the most recent one matters; a pending one is replaced
+COALESCED_EVENTS = {
+    "mute_changed",
+    "options_changed",
+    "seeked",
+    "stream_title_changed",
+    "volume_changed",
+}
+
+
+@callback
+def async_get_websocket_manager(hass: HomeAssistant) -> "MopidyWebsocketManager":
+    """Return the websocket manager shared by all Mopidy servers"""
+    manager = hass.data.get(DATA_WEBSOCKETS)
+    if manager is None:
+        manager = hass.data[DATA_WEBSOCKETS] = MopidyWebsocketManager(hass)
+    return manager
+
+
+class MopidyWebsocketManager:
+    """Event websocket connections of all Mopidy servers.
+
+    Every server has one task on the Home Assistant event loop that keeps its
+    websocket connected (with heartbeats and a jittered, doubling reconnect
+    delay) and hands every event straight to the registered handler.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the manager"""
+        self.hass = hass
+        self._tasks: dict[str, asyncio.Task] = {}
+        self._event_types: dict[tuple[str, tuple[str, ...]], type] = {}
+
+    @callback
+    def async_register(
+        self,
+        url: str,
+        on_event: EventHandler,
+        on_connection: ConnectionHandler | None = None,
+    ) -> Callable[[], None]:
+        """Listen to the events of the Mopidy server at url
+
+        Args:
+            url: Websocket URL of the server
+            on_event: Called on the event loop with the event name and data
+            on_connection: Called on the event loop when the connection goes up or down
+
+        Returns:
+            Callback that closes the connection
+        """
+        self.async_unregister(url)
+        self._tasks[url] = self.hass.async_create_background_task(
+            self.__async_listen(url, on_event, on_connection),
+            f"mopidy websocket {url}",
+        )
+
+        @callback
+        def unregister() -> None:
+            self.async_unregister(url)
+
+        return unregister
+
+    @callback
+    def async_unregister(self, url: str) -> None:
+        """Close the connection to the Mopidy server at url"""
+        task = self._tasks.pop(url, None)
+        if task is not None:
+            task.cancel()
+
+    def __event_data(self, event: dict[str, Any]) -> Any:
+        """Deserialize an event into a namedtuple, like mopidyapi does"""
+        name = event["event"]
+        key = (name, tuple(event))
+        event_type = self._event_types.get(key)
+        if event_type is None:
+            event_type = self._event_types[key] = namedtuple(name, event)
+        return event_type(**{k: deserialize_mopidy(v) for k, v in event.items()})
+
+    async def __async_listen(
+        self,
+        url: str,
+        on_event: EventHandler,
+        on_connection: ConnectionHandler | None,
+    ) -> None:
+        """Keep the websocket of one server connected and dispatch its events"""
+        session = async_get_clientsession(self.hass)
+        delay = WS_RECONNECT_MIN_SECONDS
+        connected_before = False
+        while True:
+            connected = False
+            try:
+                async with session.ws_connect(url, heartbeat=WS_HEARTBEAT_SECONDS) as ws:
+                    if connected_before:
+                        _LOGGER.info("Reconnected the websocket to %s", url)
+                    connected = connected_before = True
+                    delay = WS_RECONNECT_MIN_SECONDS
+                    if on_connection is not None:
+                        on_connection(True)
+
+                    async for msg in ws:
+                        if msg.type != aiohttp.WSMsgType.TEXT:
+                            continue
+                        try:
+                            event = json.loads(msg.data)
+                        except ValueError:
+                            _LOGGER.debug("Ignoring invalid websocket message from %s", url)
+                            continue
+                        if not isinstance(event, dict) or "event" not in event:
+                            continue
+                        try:
+                            on_event(event["event"], self.__event_data(event))
+                        except Exception:  # pylint: disable=broad-except
+                            _LOGGER.exception("Error handling the %s event of %s", event["event"], url)
+
+            except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as error:
+                _LOGGER.debug("Websocket connection to %s failed: %s", url, str(error))
+
+            if connected:
+                _LOGGER.warning("The websocket connection to %s was interrupted, reconnecting", url)
+                if on_connection is not None:
+                    on_connection(False)
+
+            await asyncio.sleep(delay * random.uniform(0.8, 1.2))
+            delay = min(delay * 2, WS_RECONNECT_MAX_SECONDS)
+
+
+class MopidyEventQueue:
+    """Bounded queue handing server events to the event loop in order.
+
+    put() may be called from any thread. Events are applied on the event loop
+    in arrival order; a pending event listed in COALESCED_EVENTS is replaced by
+    a newer one of the same kind. When the queue is full the oldest event is
+    dropped and on_overflow is called once the queue has been drained, so the
+    owner can resynchronize its state.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        handler: EventHandler,
+        on_overflow: Callable[[], None] | None = None,
+        max_size: int = WS_EVENT_QUEUE_SIZE,
+    ) -> None:
+        """Initialize an empty event queue"""
+        self.hass = hass
+        self._handler = handler
+        self._on_overflow = on_overflow
+        self._max_size = max_size
+        self._events: deque[tuple[str, Any]] = deque()
+        self._lock = threading.Lock()
+        self._scheduled = False
+        self._dropped = 0
+
+    def put(self, event: str, data: Any) -> None:
+        """Queue an event (thread-safe)"""
+        with self._lock:
+            if event in COALESCED_EVENTS:
+                for index, (pending, _) in enumerate(self._events):
+                    if pending == event:
+                        del self._events[index]
+                        break
+            if len(self._events) >= self._max_size:
+                self._events.popleft()
+                self._dropped += 1
+            self._events.append((event, data))
+            if self._scheduled:
+                return
+            self._scheduled = True
+
+        self.hass.loop.call_soon_threadsafe(self.__drain)
+
+    @callback
+    def __drain(self) -> None:
+        """Apply all queued events, oldest first"""
+        with self._lock:
+            events = list(self._events)
+            self._events.clear()
+            self._scheduled = False
+            dropped, self._dropped = self._dropped, 0
+
+        for event, data in events:
+            try:
+                self._handler(event, data)
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception("Error handling the %s event", event)
+
+        if dropped > 0:
+            _LOGGER.debug("Dropped %d events from a full event queue", dropped)
+            if self._on_overflow is not None:
+                self._on_overflow()
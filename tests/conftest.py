@@ -0,0 +1,5 @@
+"""Make the integration importable as custom_components.mopidy in tests."""
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
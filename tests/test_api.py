@@ -0,0 +1,201 @@
+"""Tests for the Mopidy JSON-RPC client."""
+import logging
+
+import pytest
+
+pytest.importorskip("homeassistant")
+pytest.importorskip("mopidyapi")
+
+from requests.exceptions import ReadTimeout  # noqa: E402
+
+from custom_components.mopidy import api  # noqa: E402
+
+
+class FakeResponse:
+    def __init__(self, payload):
+        self._payload = payload
+
+    def json(self):
+        return self._payload
+
+
+@pytest.fixture
+def posts(monkeypatch):
+    """Record the posted payloads and timeouts, answering from a list"""
+    calls = []
+    answers = []
+
+    def post(url, json, timeout):
+        calls.append((json, timeout))
+        answer = answers.pop(0)
+        if isinstance(answer, BaseException):
+            raise answer
+        return FakeResponse(answer)
+
+    monkeypatch.setattr(api, "post", post)
+    return calls, answers
+
+
+def _client(**kwargs):
+    return api.MopidyClient(
+        host="mopidy.local",
+        port=6680,
+        use_websocket=False,
+        logger=logging.getLogger(__name__),
+        timeout=(3, 15),
+        **kwargs,
+    )
+
+
+def test_long_running_calls_get_the_finite_long_timeout(posts):
+    calls, answers = posts
+    client = _client(long_timeout=120)
+    answers.extend([{"id": 0, "result": None}, {"id": 0, "result": []}])
+
+    client.rpc_call("core.playback.play")
+    client.rpc_call("core.library.search", query={"any": ["x"]})
+
+    assert [timeout for _, timeout in calls] == [(3, 15), (3, 120)]
+
+
+def test_long_running_calls_block_overrides_the_timeout(posts):
+    calls, answers = posts
+    client = _client()
+    answers.extend([{"id": 0, "result": None}] * 3)
+
+    with client.long_running_calls():
+        client.rpc_call("core.playback.play")
+    with client.long_running_calls(timeout=(3, 7)):
+        client.rpc_call("core.playback.play")
+    with client.long_running_calls(timeout=None):
+        client.rpc_call("core.playback.play")
+
+    assert [timeout for _, timeout in calls] == [(3, api.RPC_LONG_TIMEOUT_SECONDS), (3, 7), None]
+
+
+def test_long_running_read_timeout_is_not_a_connection_failure(posts):
+    _, answers = posts
+    breaker = api.CircuitBreaker("mopidy.local:6680")
+    client = _client(breaker=breaker)
+    answers.append(ReadTimeout())
+
+    with pytest.raises(api.RpcTimeoutError):
+        client.rpc_call("core.library.refresh")
+
+    assert breaker.state == api.BREAKER_CLOSED
+
+
+def test_rpc_batch_returns_results_in_call_order(posts):
+    calls, answers = posts
+    client = _client()
+    answers.append([{"id": 1, "result": 50}, {"id": 0, "result": "playing"}])
+
+    results = client.rpc_batch([
+        ("core.playback.get_state", {}),
+        ("core.mixer.get_volume", {}),
+    ])
+
+    assert results == ["playing", 50]
+    assert [x["method"] for x in calls[0][0]] == ["core.playback.get_state", "core.mixer.get_volume"]
+
+
+def test_rpc_batch_maps_errors(posts):
+    _, answers = posts
+    client = _client()
+    error = {"code": -32601, "message": "Method not found"}
+    answers.extend([
+        [{"id": 0, "result": 1}, {"id": 1, "error": error}],
+        [{"id": 0, "result": 1}, {"id": 1, "error": error}],
+    ])
+    batch = [("core.mixer.get_volume", {}), ("core.unknown", {})]
+
+    with pytest.raises(api.MopidyError, match="Method not found"):
+        client.rpc_batch(batch)
+
+    results = client.rpc_batch(batch, return_errors=True)
+    assert results[0] == 1
+    assert isinstance(results[1], api.MopidyError)
+
+
+def test_rpc_batch_rejected_as_a_whole(posts):
+    _, answers = posts
+    client = _client()
+    answers.extend([
+        {"id": None, "error": {"code": -32600, "message": "Invalid Request"}},
+        None,
+    ])
+
+    with pytest.raises(api.MopidyError, match="Invalid Request"):
+        client.rpc_batch([("core.mixer.get_volume", {})])
+    with pytest.raises(api.MopidyError, match="Unexpected response"):
+        client.rpc_batch([("core.mixer.get_volume", {})])
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Freeze the breaker clock and remove the jitter"""
+    now = [1000.0]
+    monkeypatch.setattr(api.time, "monotonic", lambda: now[0])
+    monkeypatch.setattr(api.random, "uniform", lambda low, high: 0.0)
+    return now
+
+
+def _open_breaker():
+    breaker = api.CircuitBreaker("mopidy.local:6680")
+    for _ in range(api.BREAKER_FAILURE_THRESHOLD):
+        assert breaker.allow_request()
+        breaker.record_failure()
+    return breaker
+
+
+def test_breaker_opens_after_consecutive_failures(clock):
+    breaker = api.CircuitBreaker("mopidy.local:6680")
+    for _ in range(api.BREAKER_FAILURE_THRESHOLD - 1):
+        breaker.record_failure()
+    breaker.record_success()
+    for _ in range(api.BREAKER_FAILURE_THRESHOLD - 1):
+        breaker.record_failure()
+    assert breaker.state == api.BREAKER_CLOSED
+
+    breaker.record_failure()
+    assert breaker.state == api.BREAKER_OPEN
+    assert breaker.is_open
+    assert not breaker.allow_request()
+
+
+def test_breaker_lets_a_single_probe_through(clock):
+    breaker = _open_breaker()
+    clock[0] += api.BREAKER_BACKOFF_MIN_SECONDS
+
+    assert breaker.allow_request()
+    assert breaker.state == api.BREAKER_HALF_OPEN
+    assert not breaker.allow_request()
+
+    breaker.record_success()
+    assert breaker.state == api.BREAKER_CLOSED
+    assert breaker.allow_request()
+
+
+def test_breaker_doubles_the_backoff_up_to_the_maximum(clock):
+    breaker = _open_breaker()
+    backoff = api.BREAKER_BACKOFF_MIN_SECONDS
+    while backoff < api.BREAKER_BACKOFF_MAX_SECONDS:
+        clock[0] += backoff
+        assert breaker.allow_request()
+        breaker.record_failure()
+        backoff = min(backoff * 2, api.BREAKER_BACKOFF_MAX_SECONDS)
+        clock[0] += backoff - 0.1
+        assert not breaker.allow_request()
+        clock[0] -= backoff - 0.1
+
+    clock[0] += api.BREAKER_BACKOFF_MAX_SECONDS
+    assert breaker.allow_request()
+
+
+def test_open_breaker_fails_fast_without_a_request(posts, clock):
+    calls, _ = posts
+    client = _client(breaker=_open_breaker())
+
+    with pytest.raises(api.CircuitOpenError):
+        client.rpc_call("core.playback.play")
+    assert calls == []
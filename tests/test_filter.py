@@ -0,0 +1,56 @@
+"""Tests for compiling queue filter criteria."""
+import pytest
+
+pytest.importorskip("homeassistant")
+pytest.importorskip("mopidyapi")
+
+from custom_components.mopidy.speaker import compile_filter_group  # noqa: E402
+
+COLUMNS = {
+    "tlid": [1, 2, 3],
+    "uri": ["local:track:1", "local:track:2", "local:track:3"],
+    "artist": ["queen", "björk", "the beatles"],
+    "artists": [("queen", "david bowie"), ("björk",), ("the beatles",)],
+    "album": ["hot space", "homogenic", "abbey road"],
+    "genre": ["rock", "electronic", "rock"],
+    "name": ["under pressure", "jóga", "come together"],
+    "duration": [248, 305, None],
+}
+
+
+def _matches(criteria):
+    predicate = compile_filter_group(criteria, COLUMNS)
+    return [COLUMNS["tlid"][i] for i in range(len(COLUMNS["tlid"])) if predicate(i)]
+
+
+def test_substring_match_is_case_insensitive():
+    assert _matches({"artist": "QUEEN"}) == [1]
+    assert _matches({"track_name": "Jóga"}) == [2]
+
+
+def test_all_criteria_of_a_group_must_match():
+    assert _matches({"genre": "rock"}) == [1, 3]
+    assert _matches({"genre": "rock", "album": "abbey"}) == [3]
+
+
+def test_any_artist_matches_featured_artists():
+    assert _matches({"artist": "bowie"}) == []
+    assert _matches({"artist": "bowie", "any_artist": True}) == [1]
+
+
+def test_regex_criteria():
+    assert _matches({"track_name": "^(under|come) ", "regex": True}) == [1, 3]
+    with pytest.raises(ValueError, match="Invalid regular expression"):
+        compile_filter_group({"artist": "(", "regex": True}, COLUMNS)
+
+
+def test_duration_range_skips_unknown_durations():
+    assert _matches({"min_duration": 250}) == [2]
+    assert _matches({"max_duration": 300}) == [1]
+
+
+def test_empty_group_is_rejected():
+    with pytest.raises(ValueError):
+        compile_filter_group({}, COLUMNS)
+    with pytest.raises(ValueError):
+        compile_filter_group({"artist": ""}, COLUMNS)
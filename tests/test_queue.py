@@ -0,0 +1,120 @@
+"""Tests for the queue mirror of a Mopidy server."""
+from types import SimpleNamespace
+import threading
+
+import pytest
+
+pytest.importorskip("homeassistant")
+pytest.importorskip("mopidyapi")
+
+from custom_components.mopidy.speaker import MopidyLibrary, MopidyQueue  # noqa: E402
+
+
+def _track(uri, name, artist="Artist", album="Album", length=180000):
+    return SimpleNamespace(
+        uri=uri,
+        name=name,
+        artists=[SimpleNamespace(name=artist, uri=None)],
+        album=SimpleNamespace(name=album, uri=None, date=None),
+        length=length,
+        track_no=None,
+        date=None,
+        genre=None,
+    )
+
+
+def _queue(tl_tracks):
+    queue = MopidyQueue()
+    queue.hostname = "mopidy.local"
+    queue.port = 6680
+    queue.library = MopidyLibrary()
+    queue.api = SimpleNamespace(
+        tracklist=SimpleNamespace(get_tl_tracks=lambda: list(tl_tracks))
+    )
+    return queue
+
+
+def test_update_tracks_mirrors_and_purges_the_queue():
+    tl_tracks = [
+        SimpleNamespace(tlid=1, track=_track("local:track:a", "A")),
+        SimpleNamespace(tlid=2, track=_track("local:track:b", "B")),
+    ]
+    queue = _queue(tl_tracks)
+    queue.update_tracks()
+    assert queue.uri_list == ["local:track:a", "local:track:b"]
+
+    tl_tracks.pop(0)
+    queue.update_tracks()
+    assert queue.uri_list == ["local:track:b"]
+    assert queue.columns["tlid"] == [2]
+    assert queue.columns["name"] == ["b"]
+
+
+def test_uri_list_follows_the_tracklist_order_with_repeated_tracks():
+    tl_tracks = [
+        SimpleNamespace(tlid=1, track=_track("local:track:a", "A")),
+        SimpleNamespace(tlid=2, track=_track("local:track:b", "B")),
+    ]
+    queue = _queue(tl_tracks)
+    queue.update_tracks()
+
+    # The first track was moved to the end and queued once more
+    tl_tracks[:] = [
+        tl_tracks[1],
+        tl_tracks[0],
+        SimpleNamespace(tlid=3, track=_track("local:track:a", "A")),
+    ]
+    queue.update_tracks()
+
+    assert queue.uri_list == ["local:track:b", "local:track:a", "local:track:a"]
+
+
+def test_playback_events_and_refreshes_do_not_race():
+    tl_tracks = [
+        SimpleNamespace(tlid=tlid, track=_track(f"local:track:{tlid}", str(tlid)))
+        for tlid in range(200)
+    ]
+    queue = _queue(tl_tracks)
+    errors = []
+
+    def refresh():
+        try:
+            for _ in range(50):
+                queue.update_tracks()
+        except Exception as error:  # pragma: no cover - reported below
+            errors.append(error)
+
+    thread = threading.Thread(target=refresh)
+    thread.start()
+    for tlid in range(1000, 3000):
+        queue.parse_track_info(_track(f"local:track:{tlid}", "new"), tlid, current=True)
+    thread.join()
+
+    assert errors == []
+    assert queue.current_track_uri == "local:track:2999"
+
+
+def test_position_is_queried_again_after_a_track_change(monkeypatch):
+    positions = []
+    current = [SimpleNamespace(tlid=1, track=_track("local:track:a", "A"))]
+    queue = _queue(current)
+    queue.api.playback = SimpleNamespace(
+        get_current_tl_track=lambda: current[0],
+        get_time_position=lambda: positions.append(None) or 42000,
+        get_stream_title=lambda: None,
+    )
+    monkeypatch.setattr(queue, "update_current_image_url", lambda *args, **kwargs: None)
+    monkeypatch.setattr(queue, "prefetch_images", lambda: None)
+
+    queue.update_current_track()
+    queue.update_current_track()
+    assert len(positions) == 1
+    assert queue.current_track_position == 42
+
+    current[0] = SimpleNamespace(tlid=2, track=_track("local:track:b", "B"))
+    queue.update_current_track()
+    assert len(positions) == 2
+
+    queue.request_position_refresh()
+    queue.update_current_track()
+    assert len(positions) == 3
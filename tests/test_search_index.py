@@ -0,0 +1,99 @@
+"""Tests for the fuzzy search trigram index."""
+import importlib.util
+from pathlib import Path
+import random
+import time
+
+import pytest
+
+_SPEC = importlib.util.spec_from_file_location(
+    "search_index",
+    Path(__file__).parent.parent / "custom_components" / "mopidy" / "search_index.py",
+)
+search_index = importlib.util.module_from_spec(_SPEC)
+_SPEC.loader.exec_module(search_index)
+
+TrigramIndex = search_index.TrigramIndex
+
+
+def _small_index():
+    index = TrigramIndex()
+    index.add("local:track:1", "Queen", "A Night at the Opera", "Bohemian Rhapsody")
+    index.add("local:track:2", "Queen", "News of the World", "We Are the Champions")
+    index.add("local:track:3", "Björk", "Homogenic", "Jóga")
+    index.add("local:track:4", "The Beatles", "Abbey Road", "Come Together")
+    return index
+
+
+def test_normalize_text_folds_case_accents_and_punctuation():
+    assert search_index.normalize_text("Björk — Jóga!") == "bjork joga"
+    assert search_index.normalize_text(None) == ""
+
+
+def test_exact_match_ranks_first():
+    results = _small_index().search({"track_name": "Bohemian Rhapsody"}, 10, 0.3)
+    assert results[0] == ("local:track:1", 1.0)
+
+
+def test_misspelling_and_accents_match():
+    index = _small_index()
+    assert index.search({"track_name": "bohemain rapsody"}, 10, 0.3)[0][0] == "local:track:1"
+    assert index.search({"artist": "bjork"}, 10, 0.3)[0][0] == "local:track:3"
+
+
+def test_any_field_searches_all_fields():
+    uris = [uri for uri, _ in _small_index().search({"any": "abbey road"}, 10, 0.3)]
+    assert uris[0] == "local:track:4"
+
+
+def test_all_terms_are_averaged():
+    results = _small_index().search({"artist": "queen", "track_name": "champions"}, 10, 0.3)
+    assert results[0][0] == "local:track:2"
+    assert results[0][1] > dict(results).get("local:track:1", 0)
+
+
+def test_min_score_and_limit():
+    index = _small_index()
+    assert index.search({"track_name": "zzzzzz"}, 10, 0.3) == []
+    assert len(index.search({"artist": "queen"}, 1, 0.0)) == 1
+    assert index.search({"artist": ""}, 10, 0.3) == []
+
+
+@pytest.fixture(scope="module")
+def large_index():
+    rnd = random.Random(1)
+    vocab = [
+        "".join(rnd.choice("aeioubcdfghklmnprstvwz") for _ in range(rnd.randint(2, 9)))
+        for _ in range(8000)
+    ] + ["the", "of", "a", "in", "love", "live", "me", "you", "i", "my"] * 50
+
+    def phrase(low, high):
+        return " ".join(rnd.choice(vocab) for _ in range(rnd.randint(low, high)))
+
+    artists = [phrase(1, 3) for _ in range(5000)]
+    albums = [phrase(1, 4) for _ in range(10000)]
+    index = TrigramIndex()
+    for i in range(100000):
+        index.add(f"local:track:{i}", artists[i % 5000], albums[i % 10000], phrase(1, 6))
+    return index, artists, albums
+
+
+def test_search_100k_tracks_well_under_100ms(large_index):
+    index, artists, albums = large_index
+    queries = [
+        {"any": "the love of my life"},
+        {"artist": artists[7]},
+        {"track_name": "a i me my of the in you"},
+        {"any": albums[3]},
+        {"artist": artists[1], "track_name": "love me"},
+        {"any": "a b c d e f g h i"},
+    ]
+    for query in queries:
+        elapsed = []
+        for _ in range(3):
+            start = time.perf_counter()
+            index.search(query, 50, 0.3)
+            elapsed.append(time.perf_counter() - start)
+        assert min(elapsed) < 0.1, query
+
+    assert index.search({"artist": artists[7]}, 50, 0.3)[0][1] == 1.0
@@ -0,0 +1,94 @@
+"""Tests for the websocket event queue."""
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("homeassistant")
+pytest.importorskip("aiohttp")
+pytest.importorskip("mopidyapi")
+
+from custom_components.mopidy.websocket import MopidyEventQueue  # noqa: E402
+
+
+def _queue(max_size=10):
+    scheduled = []
+    handled = []
+    overflows = []
+    hass = SimpleNamespace(loop=SimpleNamespace(call_soon_threadsafe=scheduled.append))
+    queue = MopidyEventQueue(
+        hass,
+        lambda event, data: handled.append((event, data)),
+        on_overflow=lambda: overflows.append(True),
+        max_size=max_size,
+    )
+
+    def drain():
+        while scheduled:
+            scheduled.pop(0)()
+
+    return queue, scheduled, handled, overflows, drain
+
+
+def test_events_are_applied_in_order_with_one_drain():
+    queue, scheduled, handled, _, drain = _queue()
+    queue.put("track_playback_started", 1)
+    queue.put("tracklist_changed", 2)
+    queue.put("track_playback_ended", 3)
+
+    assert len(scheduled) == 1
+    drain()
+    assert handled == [
+        ("track_playback_started", 1),
+        ("tracklist_changed", 2),
+        ("track_playback_ended", 3),
+    ]
+
+
+def test_pending_last_value_events_are_coalesced():
+    queue, _, handled, _, drain = _queue()
+    queue.put("volume_changed", 10)
+    queue.put("tracklist_changed", None)
+    queue.put("volume_changed", 20)
+    queue.put("tracklist_changed", None)
+    queue.put("volume_changed", 30)
+    drain()
+
+    assert handled == [
+        ("tracklist_changed", None),
+        ("tracklist_changed", None),
+        ("volume_changed", 30),
+    ]
+
+
+def test_overflow_drops_the_oldest_events_and_reports_once():
+    queue, _, handled, overflows, drain = _queue(max_size=3)
+    for number in range(5):
+        queue.put("tracklist_changed", number)
+    drain()
+
+    assert [data for _, data in handled] == [2, 3, 4]
+    assert overflows == [True]
+
+    queue.put("tracklist_changed", 5)
+    drain()
+    assert overflows == [True]
+
+
+def test_a_failing_handler_does_not_stop_the_drain():
+    scheduled = []
+    handled = []
+
+    def handler(event, data):
+        if data == 1:
+            raise RuntimeError("boom")
+        handled.append(data)
+
+    queue = MopidyEventQueue(
+        SimpleNamespace(loop=SimpleNamespace(call_soon_threadsafe=scheduled.append)),
+        handler,
+    )
+    queue.put("tracklist_changed", 1)
+    queue.put("tracklist_changed", 2)
+    scheduled.pop()()
+
+    assert handled == [2]